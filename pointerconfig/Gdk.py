@@ -18,6 +18,7 @@
 import ctypes
 import ctypes.util
 
+from pointerconfig import rules
 from gi.repository import Gdk
 from gi.repository.Gdk import GrabOwnership
 from gi.repository.Gdk import EventMask
@@ -25,93 +26,199 @@ from gi.repository.Gdk import Cursor
 from gi.repository.Gdk import CursorType
 from gi.repository.Gdk import CURRENT_TIME
 from gi.repository.Gdk import GrabStatus
+from gi.repository.Gdk import InputSource
 from gi.repository.Gdk import WindowTypeHint
 from gi.repository.Gdk import Gravity
 from gi.repository.Gdk import RGBA
 from gi.repository.Gdk import DeviceType
 from gi.repository.Gdk import Screen
+from gi.repository.Gdk import init_check
+from gi.repository.Gdk import Window
+from gi.repository.Gdk import WindowAttr
+from gi.repository.Gdk import WindowType
+from gi.repository.Gdk import WindowWindowClass
 
 _gdk = ctypes.CDLL(ctypes.util.find_library('gdk-3'))
 _glib = ctypes.CDLL(ctypes.util.find_library('glib-2'))
 _gobject = ctypes.CDLL(ctypes.util.find_library('gobject-2'))
 
 
+class _GList(ctypes.Structure):
+    pass
+
+
+_GList._fields_ = [('data', ctypes.c_void_p),
+                   ('next', ctypes.POINTER(_GList)),
+                   ('prev', ctypes.POINTER(_GList))]
+
+
 class GdkX11(object):
 
     def gdk_x11_device_get_id(device):
         return _gdk.gdk_x11_device_get_id(device)
 
+    def gdk_x11_display_get_xdisplay(display):
+        return _gdk.gdk_x11_display_get_xdisplay(display)
+
     gdk_x11_device_get_id = staticmethod(gdk_x11_device_get_id)
+    gdk_x11_display_get_xdisplay = staticmethod(gdk_x11_display_get_xdisplay)
 
 
 class Device(ctypes.c_void_p):
 
     def get_name(self):
-        _gdk.gdk_device_get_name.restype = ctypes.c_char_p
         return _gdk.gdk_device_get_name(self)
 
     def get_source(self):
-        _gdk.gdk_device_get_source.restype = Gdk.InputSource
         return _gdk.gdk_device_get_source(self)
 
+    def get_device_type(self):
+        return DeviceType(_gdk.gdk_device_get_device_type(self))
+
+    def get_vendor_id(self):
+        if hasattr(_gdk, 'gdk_device_get_vendor_id'):
+            return _gdk.gdk_device_get_vendor_id(self)
+
 
 class Manager(ctypes.c_void_p):
 
     _callback = dict()
-
-    def append_device(self, data):
-        self.device.append(data)
+    _connected = dict()
 
     def list_devices(self, device_type):
-        self.device = list()
-        _gdk.gdk_device_manager_list_devices.restype = ctypes.c_void_p
-        glist = _gdk.gdk_device_manager_list_devices(self, device_type.real)
-        prototype = ctypes.CFUNCTYPE(None, Device)
-        _glib.g_list_foreach(glist, prototype(self.append_device))
-        _glib.g_list_free(glist)
-        device = self.device
-        del self.device
-        return device
+        return list(self.iter_devices(device_type))
 
     def iter_devices(self, device_type):
-        ''' iterate over devices, causes seg fault in some cases '''
-        _gdk.gdk_device_manager_list_devices.restype = ctypes.c_void_p
         head = _gdk.gdk_device_manager_list_devices(self, device_type.real)
-        _glib.g_list_nth_data.restype = Device
-        device = _glib.g_list_nth_data(head, 0)
-        _glib.g_list_delete_link.restype = ctypes.c_void_p
-        while device:
-            yield device
-            head = _glib.g_list_delete_link(head, head)
-            device = _glib.g_list_nth_data(head, 0)
+        node = head
+        try:
+            while node:
+                yield Device(node.contents.data)
+                node = node.contents.next
+        finally:
+            _glib.g_list_free(head)
 
     def device_added(manager, device, data):
-        Manager._callback['device-added'](manager, device)
+        for handler in list(Manager._callback['device-added']):
+            handler(manager, device)
 
     def device_changed(manager, device, data):
-        Manager._callback['device-changed'](manager, device)
+        for handler in list(Manager._callback['device-changed']):
+            handler(manager, device)
+
+    def device_removed(manager, device, data):
+        for handler in list(Manager._callback['device-removed']):
+            handler(manager, device)
 
     device_added = staticmethod(device_added)
     device_changed = staticmethod(device_changed)
+    device_removed = staticmethod(device_removed)
 
     def connect(self, signal, handler):
-        call = _prototype(getattr(Manager, signal.replace('-', '_')))
-        Manager._callback[signal] = handler
-        _gobject.g_signal_connect_object.restype = ctypes.c_ulong
-        return _gobject.g_signal_connect_object(self, signal, call, None, 0)
+        Manager._callback.setdefault(signal, list()).append(handler)
+        if (self.value, signal) not in Manager._connected:
+            call = _trampoline[signal]
+            Manager._connected[self.value, signal] = \
+                _gobject.g_signal_connect_object(self, signal, call, None, 0)
+        return Manager._connected[self.value, signal]
 
 
 _prototype = ctypes.CFUNCTYPE(None, Manager, Device, ctypes.c_void_p)
+# created once, the trampolines must outlive every connection
+_trampoline = {'device-added': _prototype(Manager.device_added),
+               'device-changed': _prototype(Manager.device_changed),
+               'device-removed': _prototype(Manager.device_removed)}
 
 
 class Display(ctypes.c_void_p):
 
     def get_default(cls):
-        _gdk.gdk_display_get_default.restype = cls
         return _gdk.gdk_display_get_default()
 
     get_default = classmethod(get_default)
 
+    def open(cls, name):
+        return _gdk.gdk_display_open(name)
+
+    open = classmethod(open)
+
     def get_device_manager(self):
-        _gdk.gdk_display_get_device_manager.restype = Manager
         return _gdk.gdk_display_get_device_manager(self)
+
+
+_gdk.gdk_x11_device_get_id.restype = ctypes.c_int
+_gdk.gdk_x11_device_get_id.argtypes = [ctypes.c_void_p]
+_gdk.gdk_x11_display_get_xdisplay.restype = ctypes.c_void_p
+_gdk.gdk_x11_display_get_xdisplay.argtypes = [ctypes.c_void_p]
+_gdk.gdk_device_get_name.restype = ctypes.c_char_p
+_gdk.gdk_device_get_name.argtypes = [ctypes.c_void_p]
+_gdk.gdk_device_get_source.restype = Gdk.InputSource
+_gdk.gdk_device_get_source.argtypes = [ctypes.c_void_p]
+_gdk.gdk_device_get_device_type.restype = ctypes.c_int
+_gdk.gdk_device_get_device_type.argtypes = [ctypes.c_void_p]
+if hasattr(_gdk, 'gdk_device_get_vendor_id'):
+    _gdk.gdk_device_get_vendor_id.restype = ctypes.c_char_p
+    _gdk.gdk_device_get_vendor_id.argtypes = [ctypes.c_void_p]
+_gdk.gdk_device_manager_list_devices.restype = ctypes.POINTER(_GList)
+_gdk.gdk_device_manager_list_devices.argtypes = [
+    ctypes.c_void_p, ctypes.c_int]
+_glib.g_list_free.argtypes = [ctypes.POINTER(_GList)]
+_gobject.g_signal_connect_object.restype = ctypes.c_ulong
+_gobject.g_signal_connect_object.argtypes = [
+    ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p, ctypes.c_void_p,
+    ctypes.c_int]
+_gdk.gdk_display_get_default.restype = Display
+_gdk.gdk_display_open.restype = Display
+_gdk.gdk_display_open.argtypes = [ctypes.c_char_p]
+_gdk.gdk_display_get_device_manager.restype = Manager
+_gdk.gdk_display_get_device_manager.argtypes = [ctypes.c_void_p]
+
+
+class Registry(object):
+    ''' slave devices by XID, device type and name, kept up to date '''
+
+    def __init__(self, manager, rule=None):
+        self.rules = rule or rules.Rules()
+        self.xid, self.type, self.name = (dict(), dict(), dict())
+        self.device = dict()
+        for device in manager.iter_devices(DeviceType.SLAVE):
+            self.add(device)
+        manager.connect('device-added', self.device_changed)
+        manager.connect('device-changed', self.device_changed)
+        manager.connect('device-removed', self.device_removed)
+
+    def add(self, device):
+        xid = GdkX11.gdk_x11_device_get_id(device)
+        self.remove(xid)
+        name, source = (device.get_name(), device.get_source().value_nick)
+        nick = self.rules.match(name, source, device.get_vendor_id)
+        entry = (xid, name, nick)
+        self.xid[xid], self.device[xid] = (entry, device)
+        self.name.setdefault(name, set()).add(xid)
+        self.type.setdefault(nick, set()).add(xid)
+
+    def remove(self, xid):
+        entry = self.xid.pop(xid, None)
+        self.device.pop(xid, None)
+        if entry:
+            for index, key in ((self.name, entry[1]), (self.type, entry[2])):
+                index[key].discard(xid)
+                if not index[key]:
+                    del index[key]
+
+    def set_rules(self, rule):
+        self.rules = rule
+        for device in self.device.values():
+            self.add(device)
+
+    def find(self, nick):
+        return [self.xid[x] for n in nick for x in self.type.get(n, ())]
+
+    def device_changed(self, manager, device):
+        if device.get_device_type() == DeviceType.SLAVE:
+            self.add(device)
+        else:
+            self.remove(GdkX11.gdk_x11_device_get_id(device))
+
+    def device_removed(self, manager, device):
+        self.remove(GdkX11.gdk_x11_device_get_id(device))
@@ -0,0 +1,348 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import ctypes.util
+
+from pointerconfig import timing
+from gi.repository import GLib
+
+_x11 = ctypes.CDLL(ctypes.util.find_library('X11') or 'libX11.so.6')
+_xi = ctypes.CDLL(ctypes.util.find_library('Xi') or 'libXi.so.6')
+
+Atom = ctypes.c_ulong
+XA_ATOM = 4
+XA_CARDINAL = 6
+XA_INTEGER = 19
+AnyPropertyType = 0
+PropModeReplace = 0
+Success = 0
+Relative, Absolute = (0, 1)
+XIAllDevices = 0
+XIValuatorClass = 2
+
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_int), ('display', ctypes.c_void_p),
+                ('resourceid', ctypes.c_ulong), ('serial', ctypes.c_ulong),
+                ('error_code', ctypes.c_ubyte),
+                ('request_code', ctypes.c_ubyte),
+                ('minor_code', ctypes.c_ubyte)]
+
+
+class XIAnyClassInfo(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_int), ('sourceid', ctypes.c_int)]
+
+
+class XIValuatorClassInfo(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_int), ('sourceid', ctypes.c_int),
+                ('number', ctypes.c_int), ('label', Atom),
+                ('min', ctypes.c_double), ('max', ctypes.c_double),
+                ('value', ctypes.c_double), ('resolution', ctypes.c_int),
+                ('mode', ctypes.c_int)]
+
+
+class XIDeviceInfo(ctypes.Structure):
+    _fields_ = [('deviceid', ctypes.c_int), ('name', ctypes.c_char_p),
+                ('use', ctypes.c_int), ('attachment', ctypes.c_int),
+                ('enabled', ctypes.c_int), ('num_classes', ctypes.c_int),
+                ('classes', ctypes.POINTER(ctypes.POINTER(XIAnyClassInfo)))]
+
+
+_handler = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent))
+
+
+# one X error handler for every Backend, errors go to the display's Backend
+_active = dict()
+_previous = [None]
+
+
+def _dispatch(display, event):
+    backend = _active.get(display)
+    if backend and backend.trap(event.contents):
+        return 0
+    if _previous[0]:
+        return _handler(_previous[0])(display, event)
+    return 0
+
+
+_trap = _handler(_dispatch)
+
+
+class Display(ctypes.c_void_p):
+
+    def open(cls, name=None):
+        display = _x11.XOpenDisplay(name)
+        if not display:
+            raise OSError('cannot open display ' + str(name))
+        return display
+
+    open = classmethod(open)
+
+    def close(self):
+        _x11.XCloseDisplay(self)
+
+    def next_request(self):
+        return _x11.XNextRequest(self)
+
+
+_x11.XOpenDisplay.restype = Display
+_x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+_x11.XCloseDisplay.argtypes = [Display]
+_x11.XInternAtom.restype = Atom
+_x11.XInternAtom.argtypes = [Display, ctypes.c_char_p, ctypes.c_int]
+_x11.XGetAtomName.restype = ctypes.c_void_p
+_x11.XGetAtomName.argtypes = [Display, Atom]
+_x11.XNextRequest.restype = ctypes.c_ulong
+_x11.XNextRequest.argtypes = [Display]
+_x11.XSync.argtypes = [Display, ctypes.c_int]
+_x11.XFree.argtypes = [ctypes.c_void_p]
+_x11.XGetErrorText.argtypes = [
+    Display, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+_x11.XSetErrorHandler.restype = ctypes.c_void_p
+_x11.XSetErrorHandler.argtypes = [ctypes.c_void_p]
+_xi.XIGetProperty.argtypes = [
+    Display, ctypes.c_int, Atom, ctypes.c_long, ctypes.c_long,
+    ctypes.c_int, Atom, ctypes.POINTER(Atom), ctypes.POINTER(ctypes.c_int),
+    ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong),
+    ctypes.POINTER(ctypes.c_void_p)]
+_xi.XIChangeProperty.restype = None
+_xi.XIChangeProperty.argtypes = [
+    Display, ctypes.c_int, Atom, Atom, ctypes.c_int, ctypes.c_int,
+    ctypes.c_void_p, ctypes.c_int]
+_xi.XIQueryDevice.restype = ctypes.POINTER(XIDeviceInfo)
+_xi.XIQueryDevice.argtypes = [
+    Display, ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+_xi.XIFreeDeviceInfo.argtypes = [ctypes.POINTER(XIDeviceInfo)]
+_xi.XOpenDevice.restype = ctypes.c_void_p
+_xi.XOpenDevice.argtypes = [Display, ctypes.c_ulong]
+_xi.XSetDeviceMode.argtypes = [Display, ctypes.c_void_p, ctypes.c_int]
+_xi.XCloseDevice.argtypes = [Display, ctypes.c_void_p]
+
+
+class Backend(object):
+    ''' run xinput set-prop and set-mode commands on one X connection '''
+
+    reads_mode = True
+
+    def __init__(self, display):
+        self.display = display
+        self._atom = dict()
+        self._name = dict()
+        self._format = dict()
+        self._serial = list()
+
+    def atom(self, name):
+        if name.isdigit():
+            return int(name)
+        if name not in self._atom:
+            self._atom[name] = _x11.XInternAtom(self.display, name, False)
+            timing.count('x-round-trip')
+        return self._atom[name]
+
+    def get_atom_name(self, atom):
+        if atom not in self._name:
+            name = _x11.XGetAtomName(self.display, atom)
+            timing.count('x-round-trip')
+            self._name[atom] = ctypes.string_at(name) if name else str(atom)
+            if name:
+                _x11.XFree(name)
+        return self._name[atom]
+
+    def trap(self, event):
+        for first, last, xid, error in self._serial:
+            if first <= event.serial and (last is None or event.serial < last):
+                text = ctypes.create_string_buffer(256)
+                _x11.XGetErrorText(self.display, event.error_code, text, 256)
+                error.setdefault(xid, list()).append(text.value)
+                return True
+        return False
+
+    def fail(self, error, xid, message):
+        error.setdefault(xid, list()).append(message)
+
+    def get_format(self, xid, prop):
+        if (xid, prop) not in self._format:
+            kind, size = (Atom(), ctypes.c_int())
+            count, after = (ctypes.c_ulong(), ctypes.c_ulong())
+            data = ctypes.c_void_p()
+            status = _xi.XIGetProperty(
+                self.display, xid, prop, 0, 0, False, AnyPropertyType,
+                kind, size, count, after, data)
+            timing.count('x-round-trip')
+            if data:
+                _x11.XFree(data)
+            if status != Success or not kind.value:
+                return (0, 0)
+            self._format[xid, prop] = (kind.value, size.value)
+        return self._format[xid, prop]
+
+    def get_prop(self, xid, name):
+        prop = self.atom(name)
+        kind, size = (Atom(), ctypes.c_int())
+        count, after = (ctypes.c_ulong(), ctypes.c_ulong())
+        data = ctypes.c_void_p()
+        status = _xi.XIGetProperty(
+            self.display, xid, prop, 0, 1024, False, AnyPropertyType,
+            kind, size, count, after, data)
+        timing.count('x-round-trip')
+        value = None
+        if status == Success and kind.value:
+            self._format[xid, prop] = (kind.value, size.value)
+            value = self.unpack(kind.value, size.value, data, count.value)
+        if data:
+            _x11.XFree(data)
+        return value
+
+    def get_mode(self):
+        count, mode = (ctypes.c_int(), dict())
+        info = _xi.XIQueryDevice(self.display, XIAllDevices, count)
+        timing.count('x-round-trip')
+        for device in info[:count.value if info else 0]:
+            for obj in device.classes[:device.num_classes]:
+                if obj.contents.type == XIValuatorClass:
+                    arg = ctypes.POINTER(XIValuatorClassInfo)
+                    valuator = ctypes.cast(obj, arg).contents
+                    mode[device.deviceid] = ('RELATIVE', 'ABSOLUTE')[
+                        valuator.mode == Absolute]
+                    break
+        if info:
+            _xi.XIFreeDeviceInfo(info)
+        return mode
+
+    def unpack(self, kind, size, data, count):
+        if kind == self.atom('FLOAT') and size == 32:
+            array = ctypes.cast(data, ctypes.POINTER(ctypes.c_float))
+            return tuple(map(str, array[:count]))
+        elif kind == XA_ATOM and size == 32:
+            array = ctypes.cast(data, ctypes.POINTER(ctypes.c_uint32))
+            return tuple(map(self.get_atom_name, array[:count]))
+        elif kind in (XA_INTEGER, XA_CARDINAL):
+            signed = {8: ctypes.c_int8, 16: ctypes.c_int16,
+                      32: ctypes.c_int32}[size]
+            unsigned = {8: ctypes.c_uint8, 16: ctypes.c_uint16,
+                        32: ctypes.c_uint32}[size]
+            array = (signed, unsigned)[kind == XA_CARDINAL]
+            array = ctypes.cast(data, ctypes.POINTER(array))
+            return tuple(map(str, array[:count]))
+        return (ctypes.string_at(data, count * size / 8),)
+
+    def pack(self, kind, size, value):
+        if kind == self.atom('FLOAT') and size == 32:
+            return (ctypes.c_float * len(value))(*map(float, value))
+        elif kind == XA_ATOM and size == 32:
+            return (ctypes.c_uint32 * len(value))(*map(self.atom, value))
+        elif kind in (XA_INTEGER, XA_CARDINAL):
+            array = {8: ctypes.c_uint8, 16: ctypes.c_uint16,
+                     32: ctypes.c_uint32}[size] * len(value)
+            mask = (1 << size) - 1
+            return array(*[int(v) & mask for v in value])
+        raise ValueError('unsupported property type')
+
+    def set_prop(self, xid, name, value, error, option):
+        prop = self.atom(name)
+        kind, size = self.get_format(xid, prop)
+        if 'type' in option:
+            kind, size = {'int': (XA_INTEGER, size),
+                          'float': (self.atom('FLOAT'), 32),
+                          'atom': (XA_ATOM, 32)}.get(option['type'], (0, 0))
+        if option.get('format') in ('8', '16', '32'):
+            size = int(option['format'])
+        elif 'format' in option:
+            return self.fail(error, xid, 'format must be 8, 16 or 32')
+        if not kind or not size:
+            return self.fail(error, xid, "property '%s' doesn't exist, "
+                             'you need to specify its type and format' % name)
+        try:
+            data = self.pack(kind, size, value)
+        except (ValueError, KeyError), message:
+            return self.fail(error, xid, '%s: %s' % (name, message))
+        _xi.XIChangeProperty(self.display, xid, prop, kind, size,
+                             PropModeReplace, data, len(value))
+
+    def set_mode(self, xid, mode, error):
+        mode = {'ABSOLUTE': Absolute, 'RELATIVE': Relative}.get(mode)
+        if mode is None:
+            return self.fail(error, xid, 'mode must be ABSOLUTE or RELATIVE')
+        device = _xi.XOpenDevice(self.display, xid)
+        timing.count('x-round-trip')
+        if device:
+            _xi.XSetDeviceMode(self.display, device, mode)
+            _xi.XCloseDevice(self.display, device)
+            timing.count('x-round-trip')
+
+    def begin(self):
+        if self.display.value not in _active:
+            if not _active:
+                _previous[0] = _x11.XSetErrorHandler(
+                    ctypes.cast(_trap, ctypes.c_void_p))
+            _active[self.display.value] = self
+
+    def end(self, error):
+        self._serial = [s for s in self._serial if s[3] is not error]
+        if not self._serial and _active.pop(self.display.value, None):
+            if not _active:
+                _x11.XSetErrorHandler(_previous[0])
+
+    def open_span(self, xid, error):
+        # open ended, replies of the requests themselves can carry errors
+        span = [_x11.XNextRequest(self.display), None, xid, error]
+        self._serial.append(span)
+        return span
+
+    def close_span(self, span):
+        span[1] = _x11.XNextRequest(self.display)
+
+    def read(self, query, callback, timeout):
+        self.begin()
+        current, mode, error = (dict(), dict(), dict())
+        span = self.open_span(0, error)
+        if [xid for xid in query if None in query[xid]]:
+            mode = self.get_mode()
+        for xid, name in [(x, n) for x in query for n in query[x]]:
+            value = mode.get(xid) and (mode[xid],)
+            if name is not None:
+                value = self.get_prop(xid, name)
+            if value is not None:
+                current[xid, name] = value
+        self.close_span(span)
+        self.end(error)
+        GLib.idle_add(callback, current)
+
+    def call(self, command, callback, timeout, error):
+        self.begin()
+        action, xid, arg = (command[0], int(command[1]), command[2:])
+        option = dict()
+        while arg and arg[0].startswith('--') and '=' in arg[0]:
+            key, value = arg[0][2:].split('=', 1)
+            option[key], arg = (value, arg[1:])
+        span = self.open_span(xid, error)
+        if action == 'set-prop' and arg:
+            self.set_prop(xid, arg[0], arg[1:], error, option)
+        elif action == 'set-mode':
+            self.set_mode(xid, arg[0], error)
+        else:
+            self.fail(error, xid, 'unsupported command ' + action)
+        self.close_span(span)
+        GLib.idle_add(callback, None)
+
+    def flush(self, error):
+        _x11.XSync(self.display, False)
+        timing.count('x-round-trip')
+        self.end(error)
+        return error
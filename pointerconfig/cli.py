@@ -0,0 +1,98 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+
+from pointerconfig import metrics
+from pointerconfig import timing
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='pointer-config')
+    parser.add_argument('-t', action='store_true',
+                        help='start with only the status icon')
+    parser.add_argument('--apply', action='store_true',
+                        help='apply the stored configuration and exit')
+    parser.add_argument('--check', action='store_true',
+                        help='list devices that differ from the '
+                             'stored configuration and exit')
+    parser.add_argument('--type', type=lambda t: t.split(','),
+                        help='comma separated device types, by default '
+                             'those configured automatically')
+    parser.add_argument('--displays', type=lambda d: d.split(','),
+                        help='comma separated X displays to --apply or '
+                             '--check at the same time')
+    parser.add_argument('--timing', metavar='FILE',
+                        help='append a JSON timing report to FILE, '
+                             '- for standard error')
+    parser.add_argument('--switch', metavar='NAME',
+                        help='apply what differs in profile NAME, make it '
+                             'the stored configuration and exit')
+    parser.add_argument('--save-profile', metavar='NAME',
+                        help='save the stored configuration as profile '
+                             'NAME and exit')
+    parser.add_argument('--delete-profile', metavar='NAME',
+                        help='delete profile NAME and exit')
+    parser.add_argument('--list-profiles', action='store_true',
+                        help='list profiles, the active one marked, and exit')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='keep counters and latency histograms, written '
+                             'to FILE in Prometheus text format, - to only '
+                             'serve --stats')
+    parser.add_argument('--stats', action='store_true',
+                        help='print the metrics of the running instance')
+    parser.add_argument('--remote', nargs='+', metavar=('ACTION', 'ARG'),
+                        help='activate ACTION of the running instance: '
+                             'apply TYPE, reapply-all, set-bounds TYPE X Y '
+                             'WIDTH HEIGHT or switch NAME')
+    return parser
+
+
+def main(argv):
+    arg, _ = get_parser().parse_known_args(argv)
+    if arg.timing:
+        timing.enable(arg.timing)
+    if arg.metrics:
+        metrics.enable(arg.metrics)
+    if arg.stats:
+        from pointerconfig import remote
+        return remote.run_stats()
+    if arg.remote:
+        from pointerconfig import remote
+        return remote.run_remote(arg.remote)
+    if arg.switch or arg.save_profile or arg.delete_profile or \
+            arg.list_profiles:
+        from pointerconfig import profile
+        if arg.save_profile:
+            return profile.run_save(arg.save_profile)
+        if arg.delete_profile:
+            return profile.run_delete(arg.delete_profile)
+        if arg.switch:
+            return profile.run_switch(arg.switch)
+        return profile.run_list()
+    if arg.apply or arg.check:
+        # Only Gdk is needed here, Gtk and cairo are never imported.
+        from pointerconfig import xinput
+        if arg.displays:
+            return xinput.run_displays(arg.displays, arg.type, arg.check)
+        if arg.check:
+            return xinput.run_check(arg.type)
+        return xinput.run_apply(arg.type)
+
+    from pointerconfig import pointer_config
+    app = pointer_config.PointerConfig()
+    return app.run(None)
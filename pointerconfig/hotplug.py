@@ -0,0 +1,84 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+from pointerconfig import metrics
+from pointerconfig import xinput
+from pointerconfig.Gdk import GdkX11
+from gi.repository import GLib
+
+
+class Hotplug(object):
+    ''' apply a burst of device arrivals once the burst has gone quiet '''
+
+    def __init__(self, manager, registry, state, params, delay=200):
+        self.registry, self.state = (registry, state)
+        self.params, self.delay = (params, delay)
+        self.pending, self.running, self.source = (set(), set(), 0)
+        self.added = dict()
+        manager.connect('device-added', self.device_added)
+        manager.connect('device-changed', self.device_changed)
+        manager.connect('device-removed', self.device_removed)
+
+    def device_added(self, manager, device):
+        metrics.count('hotplug', event='added')
+        xid = GdkX11.gdk_x11_device_get_id(device)
+        self.added.setdefault(xid, metrics.begin())
+        self.state.forget(xid)
+        self.pending.add(xid)
+        self.schedule()
+
+    def device_changed(self, manager, device):
+        metrics.count('hotplug', event='changed')
+        self.pending.add(GdkX11.gdk_x11_device_get_id(device))
+        self.schedule()
+
+    def device_removed(self, manager, device):
+        metrics.count('hotplug', event='removed')
+        xid = GdkX11.gdk_x11_device_get_id(device)
+        self.pending.discard(xid)
+        self.added.pop(xid, None)
+        self.state.forget(xid)
+
+    def schedule(self):
+        if self.source:
+            GLib.source_remove(self.source)
+        self.source = GLib.timeout_add(self.delay, self.flush)
+
+    def flush(self):
+        self.source = 0
+        xid = self.pending - self.running
+        self.pending -= xid
+        entry = [self.registry.xid[i] for i in xid if i in self.registry.xid]
+        param = xinput.load_params(self.params)
+        command = xinput.build_commands(entry, param)
+        flushed, xid = (xid, set(int(c[1]) for c in command))
+        for i in flushed - xid:
+            self.added.pop(i, None)
+        metrics.count('hotplug-flush')
+        if command:
+            self.running |= xid
+            self.state.apply(command, lambda error: self.done(xid, error))
+        return False
+
+    def done(self, xid, error):
+        self.running -= xid
+        # from device-added to the end of its apply
+        for i in xid & set(self.added):
+            metrics.end('hotplug', self.added.pop(i))
+        xinput.print_error(error)
+        if self.pending and not self.source:
+            self.schedule()
@@ -0,0 +1,136 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import atexit
+import bisect
+import os
+
+from gi.repository import GLib
+
+PREFIX = 'pointer_config_'
+BUCKET = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+          5.0)
+INTERVAL = 10
+
+_counter = dict()
+_histogram = dict()
+_enabled = False
+_changed = False
+_path = None
+
+
+def enable(path='-'):
+    ''' keep metrics, written to path every INTERVAL and at exit unless - '''
+    global _enabled, _path
+    if path != '-' and not _path:
+        atexit.register(dump)
+        GLib.timeout_add_seconds(INTERVAL, dump)
+    _enabled = True
+    _path = path if path != '-' else _path
+
+
+def enabled():
+    return _enabled
+
+
+def changed():
+    ''' whether anything was recorded since the last call '''
+    global _changed
+    result, _changed = (_changed, False)
+    return result
+
+
+def count(name, number=1, **label):
+    global _changed
+    if _enabled:
+        key = (name, tuple(sorted(label.items())))
+        _counter[key] = _counter.get(key, 0) + number
+        _changed = True
+
+
+def observe(name, seconds):
+    global _changed
+    if _enabled:
+        if name not in _histogram:
+            _histogram[name] = [0] * (len(BUCKET) + 1) + [0.0]
+        value = _histogram[name]
+        value[bisect.bisect_left(BUCKET, seconds)] += 1
+        value[-1] += seconds
+        _changed = True
+
+
+def begin():
+    return GLib.get_monotonic_time() if _enabled else 0
+
+
+def end(name, start):
+    if _enabled:
+        observe(name, (GLib.get_monotonic_time() - start) / 1e6)
+
+
+def until(name, callback):
+    if not _enabled:
+        return callback
+    start = begin()
+
+    def done(*arg):
+        end(name, start)
+        return callback(*arg)
+    return done
+
+
+def get_name(name):
+    return PREFIX + name.replace('-', '_')
+
+
+def render():
+    ''' Prometheus text exposition format '''
+    line, kind = (list(), set())
+    for key in sorted(_counter):
+        name, label = key
+        metric = get_name(name) + '_total'
+        if metric not in kind:
+            kind.add(metric)
+            line.append('# TYPE %s counter' % metric)
+        label = ','.join('%s="%s"' % pair for pair in label)
+        label = '{' + label + '}' if label else ''
+        line.append('%s%s %d' % (metric, label, _counter[key]))
+    for name in sorted(_histogram):
+        metric, value = (get_name(name) + '_seconds', _histogram[name])
+        line.append('# TYPE %s histogram' % metric)
+        total = 0
+        for le, number in zip(BUCKET + ('+Inf',), value):
+            total += number
+            line.append('%s_bucket{le="%s"} %d' % (metric, le, total))
+        line.append('%s_sum %f' % (metric, value[-1]))
+        line.append('%s_count %d' % (metric, total))
+    return ''.join(l + '\n' for l in line)
+
+
+def dump():
+    if _path:
+        try:
+            with open(_path + '.new', 'w') as output:
+                output.write(render())
+            os.rename(_path + '.new', _path)
+        except (IOError, OSError):
+            pass
+    return True
+
+
+if os.environ.get('POINTER_CONFIG_METRICS'):
+    enable(os.environ['POINTER_CONFIG_METRICS'])
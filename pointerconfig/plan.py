@@ -0,0 +1,100 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import marshal
+import os
+
+from gi.repository import GLib
+
+VERSION = 3
+SYSTEM = '/etc/dconf'
+
+
+def get_path():
+    return os.path.join(GLib.get_user_cache_dir(), 'pointer-config', 'plan')
+
+
+def get_system_databases():
+    path = [os.path.join(SYSTEM, 'profile', 'user')]
+    path += [os.path.join(d, 'dconf', 'profile', 'user')
+             for d in GLib.get_system_data_dirs()]
+    try:
+        name = sorted(os.listdir(os.path.join(SYSTEM, 'db')))
+    except OSError:
+        name = list()
+    path += [os.path.join(SYSTEM, 'db', n) for n in name]
+    return [p for p in path if os.path.isfile(p)]
+
+
+def get_key():
+    ''' stat of the dconf databases and compiled schemas, None if unknown '''
+    if os.environ.get('GSETTINGS_BACKEND', 'dconf') != 'dconf':
+        return None
+    if os.environ.get('DCONF_PROFILE'):
+        return None
+    path = [os.path.join(GLib.get_user_config_dir(), 'dconf', 'user')]
+    path += get_system_databases()
+    directory = [GLib.get_user_data_dir()] + GLib.get_system_data_dirs()
+    path += [os.path.join(d, 'glib-2.0', 'schemas') for d in directory]
+    if os.environ.get('GSETTINGS_SCHEMA_DIR'):
+        path += os.environ['GSETTINGS_SCHEMA_DIR'].split(os.pathsep)
+    key = list()
+    for name in path:
+        if name.endswith('schemas'):
+            name = os.path.join(name, 'gschemas.compiled')
+        try:
+            info = os.stat(name)
+        except OSError:
+            continue
+        key.append((name, info.st_ino, info.st_size, info.st_mtime))
+    return (VERSION, tuple(key))
+
+
+def load(nick=None, key=None):
+    ''' (parameters as load_params returns them, rules), None when stale '''
+    key = key or get_key()
+    if key is None:
+        return None
+    try:
+        with open(get_path(), 'rb') as cache:
+            saved, plan, rule = marshal.loads(cache.read())
+    except (IOError, EOFError, ValueError, TypeError):
+        return None
+    if saved != key or any(n not in plan for n in nick or ()):
+        return None
+    setup = dict((n, plan[n][1]) for n in nick or plan if nick or plan[n][0])
+    return (setup, rule)
+
+
+def save(cache, key=None):
+    key = key or get_key()
+    if key is None:
+        return
+    plan = dict()
+    for nick in cache.settings.list_children():
+        auto = cache.get_child(nick).get_boolean('auto')
+        plan[nick] = (auto, tuple(cache.get(nick)))
+    rule = [tuple(r) for r in cache.settings.get_value('rules')]
+    path = get_path()
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path + '.new', 'wb') as output:
+            output.write(marshal.dumps((key, plan, rule)))
+        os.rename(path + '.new', path)
+    except (IOError, OSError):
+        pass
@@ -15,20 +15,31 @@
 # You should have received a copy of the GNU General Public License
 # along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
 
-import shlex
-import subprocess
+import os
 import sys
-import math
-import array
 import gettext
+import marshal
 
 from pointerconfig import Gdk
-from pointerconfig.Gdk import GdkX11
+from pointerconfig import hotplug
+from pointerconfig import metrics
+from pointerconfig import profile
+from pointerconfig import remote
+from pointerconfig import timing
+from pointerconfig import transform
+from pointerconfig import xinput
 import cairo
 from gi.repository import Gtk
 from gi.repository import Gio
 from gi.repository import GLib
 
+NAME = 'pointer-config'
+RESOURCE = '/config/Pointer/pointer-config.glade'
+TRAY = ('status_main', 'menu_status', 'image_show')
+WINDOW = ('adjustment_height', 'adjustment_left', 'adjustment_size',
+          'adjustment_top', 'adjustment_width', 'dialog_about',
+          'store_properties', 'store_rotation', 'store_type', 'window_main')
+
 
 class OutlineWindow(Gtk.Window):
     def __init__(self):
@@ -43,12 +54,8 @@ class Outline(object):
         self._left, self._right = (OutlineWindow(), OutlineWindow())
 
     def transform(self, matrix, width, height):
-        scale = cairo.Matrix(xx=width, yy=height)
-        matrix = matrix.multiply(scale)
-        x, y = map(round, matrix.transform_point(0, 0))
-        x2, y2 = map(round, matrix.transform_point(1, 1))
-        self.x, self.width = (min(x, x2), max(abs(x - x2), 1))
-        self.y, self.height = (min(y, y2), max(abs(y - y2), 1))
+        bounds = transform.get_bounds(matrix, width, height)
+        self.x, self.y, self.width, self.height = bounds
 
     def move(self, size):
         self._top.move(self.x, self.y - size)
@@ -69,31 +76,89 @@ class Outline(object):
         return callback
 
 
-def get_params(schema):
-    matrix = list(schema.get_value('matrix'))
-    matrix = matrix[0::2] + matrix[1::2] + [0, 0, 1]
-    matrix = ['Coordinate Transformation Matrix'] + map(str, matrix)
-    prop = [shlex.split(p) for a, p in schema.get_value('property') if a]
-    mode = [('ABSOLUTE', 'RELATIVE')[schema.get_enum('mode')]]
-    return (matrix, mode, prop)
+class SurfaceOutline(object):
+    ''' the outline as one shaped override-redirect window '''
+
+    def __init__(self):
+        attr = Gdk.WindowAttr()
+        attr.window_type = Gdk.WindowType.TEMP
+        attr.wclass = Gdk.WindowWindowClass.INPUT_OUTPUT
+        attr.width, attr.height = (1, 1)
+        self.window = Gdk.Window(None, attr, 0)
+        self.window.input_shape_combine_region(cairo.Region(), 0, 0)
+        self.x, self.y, self.width, self.height = (0, 0, 1, 1)
+        self.geometry, self.size = (None, None)
+
+    def transform(self, matrix, width, height):
+        bounds = transform.get_bounds(matrix, width, height)
+        self.x, self.y, self.width, self.height = bounds
+
+    def move(self, size):
+        width, height = (self.width + 2 * size, self.height + 2 * size)
+        geometry, old = ((self.x - size, self.y - size, width, height),
+                         self.geometry)
+        if geometry != old:
+            self.window.move_resize(*geometry)
+        if not old or old[2:] != geometry[2:] or size != self.size:
+            region = cairo.Region(cairo.RectangleInt(0, 0, width, height))
+            inner = (size, size, self.width, self.height)
+            region.subtract(cairo.RectangleInt(*inner))
+            self.window.shape_combine_region(region, 0, 0)
+        self.geometry, self.size = (geometry, size)
+
+    resize = move
+
+    def show_all(self):
+        self.window.show()
 
+    def present_with_time(self, time):
+        self.window.show()
 
-def call_xinput(device, setup):
-    set_mode = ['xinput', 'set-mode']
-    set_prop = ['xinput', 'set-prop']
+    def hide(self):
+        self.window.hide()
+
+    def override_background_color(self, state, rgba):
+        self.window.set_background_rgba(rgba)
+        self.window.invalidate_rect(None, False)
+
+
+def get_data_dirs():
+    alt = [GLib.get_user_data_dir()] + list(GLib.get_system_data_dirs())
+    return filter(GLib.path_is_absolute, alt)
+
+
+def get_locale_dir(name):
+    ''' the locale directory with a translation, remembered once found '''
+    key = tuple(os.environ.get(k, '') for k in
+                ('LANGUAGE', 'LC_ALL', 'LC_MESSAGES', 'LANG'))
+    path = os.path.join(GLib.get_user_cache_dir(), NAME, 'locale')
     try:
-        for obj in device:
-            if not obj.get_name().startswith('Virtual core XTEST'):
-                nick = obj.get_source().value_nick
-                matrix, mode, prop = setup.get(nick, (False, False, tuple()))
-                xid = [str(GdkX11.gdk_x11_device_get_id(obj))]
-                if matrix:
-                    subprocess.call(set_prop + xid + matrix)
-                    subprocess.call(set_mode + xid + mode)
-                for param in prop:
-                    subprocess.call(set_prop + xid + param)
-    except OSError:
-        sys.exit('cannot find xinput program')
+        with open(path, 'rb') as cache:
+            saved = marshal.loads(cache.read())
+    except (IOError, EOFError, ValueError, TypeError):
+        saved = dict()
+    if saved.get(key) and gettext.find(name, saved[key]):
+        return saved[key]
+    alt = [GLib.build_filenamev((p, 'locale')) for p in get_data_dirs()]
+    found = [p for p in alt if gettext.find(name, p)]
+    if not found:
+        return None
+    saved[key] = found[0]
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as cache:
+            cache.write(marshal.dumps(saved))
+    except (IOError, OSError):
+        pass
+    return saved[key]
+
+
+def get_outline():
+    kind = os.environ.get('POINTER_CONFIG_OUTLINE', 'strips')
+    if kind == 'surface' and hasattr(cairo, 'Region'):
+        return SurfaceOutline()
+    return Outline()
 
 
 class PointerConfig(Gtk.Application):
@@ -107,30 +172,119 @@ class PointerConfig(Gtk.Application):
 
     def activate(self, application):
         if '-t' not in sys.argv:
+            self.build_ui()
             self.window_main.show_all()
         sys.argv = list()
 
-    def device_changed(self, manager, device):
-        self.manager = manager
-        key = device.set_source().value_nick
-        if reduce(lambda x, y: x or y[0] == key, self.store_type, False):
-            child = self.settings.get_child(key)
-            if child.get_boolean('auto'):
-                param = get_params(child)
-                call_xinput((device,), {key:param})
+    def get_builder(self, obj):
+        builder = Gtk.Builder()
+        builder.set_translation_domain(NAME)
+        if self.glade:
+            builder.add_objects_from_file(self.glade, obj)
+        else:
+            builder.add_objects_from_resource(RESOURCE, obj)
+        builder.connect_signals(self)
+        return builder
+
+    def build_ui(self):
+        # the window, about dialog and outline wait until first shown
+        if self.ui:
+            return
+        self.ui = True
+        with timing.phase('ui'):
+            builder = self.get_builder(WINDOW)
+            self.outline = get_outline()
+            obj = ('window_main', 'store_type', 'combo_rotation',
+                   'store_rotation', 'check_left', 'spin_left', 'check_top',
+                   'spin_top', 'check_width', 'spin_width', 'check_height',
+                   'spin_height', 'button_cursor', 'radio_absolute',
+                   'radio_relative', 'tree_properties', 'store_properties',
+                   'column_properties', 'text_properties',
+                   'selection_properties', 'grid_options', 'check_auto',
+                   'check_outline', 'button_colour', 'spin_size',
+                   'button_apply', 'dialog_about', 'selection_type')
+            for name in obj:
+                setattr(self, name, builder.get_object(name))
+            self.add_window(self.window_main)
 
     def reset_outline(self, screen):
+        start = metrics.begin()
         self.screen = screen
-        matrix = cairo.Matrix(*self.child.get_value('matrix'))
+        if 'child' not in vars(self):
+            return
+        matrix = tuple(self.child.get_value('matrix'))
         self.outline.transform(matrix, screen.get_width(), screen.get_height())
         self.outline.hide()
         self.outline.resize(self.spin_size.get_value_as_int())
         if self.child.get_boolean('outline'):
             self.outline.show_all()
         self.outline.move(self.spin_size.get_value_as_int())
+        metrics.end('reset-outline', start)
+
+    def screen_changed(self, screen):
+        # docking fires a burst of these, act once the layout settles
+        if self.screen_source:
+            GLib.source_remove(self.screen_source)
+        self.screen_source = GLib.timeout_add(500, self.screen_settled)
+
+    def screen_settled(self):
+        self.screen_source = 0
+        size = (self.screen.get_width(), self.screen.get_height())
+        previous, self.screen_size = (self.screen_size, size)
+        child, bounds = (dict(), dict())
+        for nick in self.settings.list_children():
+            child[nick] = self.settings.get_child(nick)
+            rotation = transform.ROTATION[child[nick].get_enum('rotation')]
+            bounds[nick] = (tuple(child[nick].get_value('bounds')), rotation)
+        rotation = set(r for b, r in bounds.values())
+        arg = ([b for b, r in bounds.values()], rotation)
+        matrix = transform.get_matrices(*(arg + size))
+        old = transform.get_matrices(*(arg + previous))
+        changed = list()
+        for nick in child:
+            # only follow matrices the bounds gave under the old size
+            stored = child[nick].get_value('matrix').unpack()
+            value = matrix[bounds[nick]]
+            if xinput.same_value(stored, old[bounds[nick]]) and \
+                    not xinput.same_value(stored, value):
+                arg = GLib.Variant('(dddddd)', value)
+                child[nick].set_value('matrix', arg)
+                self.params.invalidate(nick)
+                changed.append(nick)
+        param = xinput.load_params(self.params)
+        param = dict((n, param[n]) for n in changed if n in param)
+        command = xinput.build_commands(self.registry.find(param), param)
+        self.state.apply(command, xinput.print_error)
+        self.reset_outline(self.screen)
+        return False
+
+    def queue_outline(self):
+        # at most one outline update per frame while a spin button is held
+        if not self.outline_source:
+            self.outline_source = GLib.timeout_add(16, self.update_outline)
 
-    def monitors_changed(self, screen):
+    def update_outline(self):
+        self.outline_source = 0
+        self.outline.resize(self.spin_size.get_value_as_int())
         self.outline.move(self.spin_size.get_value_as_int())
+        return False
+
+    def set_setting(self, method, key, value):
+        # quick edits reach dconf as one delayed transaction
+        if not self.settings_source:
+            self.child.delay()
+            arg = (250, self.flush_settings)
+            self.settings_source = GLib.timeout_add(*arg)
+        method(key, value)
+
+    def flush_settings(self):
+        if self.settings_source:
+            GLib.source_remove(self.settings_source)
+            self.settings_source = 0
+            start = metrics.begin()
+            self.child.apply()
+            metrics.end('settings-write', start)
+        return False
 
     def window_delete(self, widget, event):
         return widget.hide_on_delete()
@@ -138,6 +292,7 @@ class PointerConfig(Gtk.Application):
     def type_changed(self, selection):
         model, i = selection.get_selected()
         self.type = model.get_value(i, 0)
+        self.flush_settings()
         self.child = self.settings.get_child(self.type)
 
         self.combo_rotation.set_active(self.child.get_enum('rotation'))
@@ -181,6 +336,89 @@ class PointerConfig(Gtk.Application):
             if self.check_height.get_active():
                 self.spin_height.set_value(y - self.spin_top.get_value())
 
+    def drag_clicked(self, widget):
+        device = Gtk.get_current_event_device()
+        if device and device.get_source() == Gdk.InputSource.KEYBOARD:
+            device = device.get_associated_device()
+        mask = (Gdk.EventMask.BUTTON_PRESS_MASK |
+                Gdk.EventMask.BUTTON_RELEASE_MASK |
+                Gdk.EventMask.POINTER_MOTION_MASK)
+        cursor = Gdk.Cursor.new(Gdk.CursorType.CROSSHAIR)
+        arg = (self.window_main.get_window(), Gdk.GrabOwnership.APPLICATION,
+               False, mask, cursor, Gtk.get_current_event_time())
+        if not device or device.grab(*arg) != Gdk.GrabStatus.SUCCESS:
+            return
+        self.capture_device, self.capture_start = (device, None)
+        for signal, handler in (('button-press-event', self.capture_press),
+                                ('motion-notify-event', self.capture_motion),
+                                ('button-release-event', self.capture_release),
+                                ('grab-broken-event', self.capture_broken)):
+            handler = self.window_main.connect(signal, handler)
+            self.capture_handler.append(handler)
+
+    def capture_press(self, widget, event):
+        if event.device == self.capture_device:
+            if event.button != 1:
+                self.capture_end(event.time)
+                self.reset_outline(self.screen)
+            else:
+                self.capture_start = (event.x_root, event.y_root)
+                self.capture_point = self.capture_start
+                self.outline.present_with_time(event.time)
+        return True
+
+    def capture_motion(self, widget, event):
+        # keep the last point, the outline follows once per frame
+        if event.device == self.capture_device and self.capture_start:
+            timing.count('capture-motion')
+            self.capture_point = (event.x_root, event.y_root)
+            if not self.capture_source:
+                arg = (16, self.capture_frame)
+                self.capture_source = GLib.timeout_add(*arg)
+        return True
+
+    def capture_frame(self):
+        timing.count('capture-frame')
+        self.capture_source = 0
+        bounds = self.capture_bounds()
+        self.outline.x, self.outline.y = bounds[:2]
+        self.outline.width, self.outline.height = bounds[2:]
+        self.update_outline()
+        return False
+
+    def capture_bounds(self):
+        (x, y), (x2, y2) = (self.capture_start, self.capture_point)
+        return (int(min(x, x2)), int(min(y, y2)),
+                int(max(abs(x - x2), 1)), int(max(abs(y - y2), 1)))
+
+    def capture_release(self, widget, event):
+        if event.device == self.capture_device and self.capture_start:
+            self.capture_point = (event.x_root, event.y_root)
+            x, y, width, height = self.capture_bounds()
+            self.capture_end(event.time)
+            self.spin_left.set_value(x)
+            self.spin_top.set_value(y)
+            self.spin_width.set_value(width)
+            self.spin_height.set_value(height)
+            # bounds, matrix and the rest in one settings transaction
+            self.apply_clicked(self.button_apply)
+        return True
+
+    def capture_broken(self, widget, event):
+        self.capture_end(Gdk.CURRENT_TIME)
+        self.reset_outline(self.screen)
+        return False
+
+    def capture_end(self, time):
+        if self.capture_source:
+            GLib.source_remove(self.capture_source)
+            self.capture_source = 0
+        for handler in self.capture_handler:
+            self.window_main.disconnect(handler)
+        self.capture_handler = list()
+        self.capture_device.ungrab(time)
+        self.capture_device, self.capture_start = (None, None)
+
     def property_toggled(self, renderer, path):
         self.store_properties[path][0] = not self.store_properties[path][0]
 
@@ -211,32 +449,34 @@ class PointerConfig(Gtk.Application):
             self.tree_properties.set_cursor_on_cell(*arg)
 
     def auto_toggled(self, button):
-        self.child.set_boolean('auto', button.get_active())
+        self.set_setting(self.child.set_boolean, 'auto', button.get_active())
 
     def outline_toggled(self, button):
         if button.get_active():
             self.outline.present_with_time(Gtk.get_current_event_time())
-            self.outline.move(self.spin_size.get_value_as_int())
+            self.queue_outline()
         else:
             self.outline.hide()
-        self.child.set_boolean('outline', button.get_active())
+        arg = ('outline', button.get_active())
+        self.set_setting(self.child.set_boolean, *arg)
 
     def colour_set(self, widget):
         rgba = widget.get_rgba()
         self.outline.override_background_color(Gtk.StateFlags.NORMAL, rgba)
         rgba = GLib.Variant('(ddd)', (rgba.red, rgba.green, rgba.blue))
-        self.child.set_value('colour', rgba)
+        self.set_setting(self.child.set_value, 'colour', rgba)
 
     def size_changed(self, spinbutton):
-        self.outline.resize(spinbutton.get_value_as_int())
-        self.outline.move(spinbutton.get_value_as_int())
-        self.child.set_uint('size', spinbutton.get_value_as_int())
+        self.queue_outline()
+        arg = ('size', spinbutton.get_value_as_int())
+        self.set_setting(self.child.set_uint, *arg)
 
     def about_clicked(self, widget):
         self.dialog_about.run()
         self.dialog_about.hide()
 
     def show_activate(self, gobject):
+        self.build_ui()
         if not self.window_main.get_visible():
             self.window_main.present_with_time(Gtk.get_current_event_time())
         elif isinstance(gobject, Gtk.StatusIcon):
@@ -244,30 +484,68 @@ class PointerConfig(Gtk.Application):
 
     def quit_activate(self, widget):
         # self.remove_window(self.window_main)
+        self.flush_settings()
+        self.release()
         self.quit()
 
     def status_popup(self, icon, button, time):
         arg = (None, None, icon.position_menu, icon, button, time)
         self.menu_status.popup(*arg)
 
+    def profiles_changed(self, settings, key):
+        for item in self.menu_profiles.get_children():
+            self.menu_profiles.remove(item)
+        item, active = (None, self.profiles.get_active())
+        for name in self.profiles.get_names():
+            item = Gtk.RadioMenuItem.new_with_label_from_widget(item, name)
+            item.set_active(name == active)
+            item.connect('toggled', self.profile_toggled, name)
+            item.show()
+            self.menu_profiles.append(item)
+        self.item_profiles.set_sensitive(bool(item))
+
+    def profiles_prepare(self):
+        self.profiles.prepare()
+        return False
+
+    def profile_toggled(self, item, name):
+        if item.get_active() and name != self.profiles.get_active():
+            self.switch_profile(name, self.apply_done)
+
+    def switch_profile(self, name, callback):
+        self.flush_settings()
+        device = self.registry.xid.values()
+        callback = timing.until('switch', callback)
+        self.profiles.switch(name, device, self.state, callback)
+        if 'type' in vars(self):
+            self.type_changed(self.selection_type)
+
+    def profile_save_activate(self, widget):
+        button = (Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+                  Gtk.STOCK_SAVE, Gtk.ResponseType.OK)
+        dialog = Gtk.Dialog(_('Save As Profile'), None, 0, button)
+        dialog.set_default_response(Gtk.ResponseType.OK)
+        entry = Gtk.Entry(activates_default=True)
+        entry.set_text(self.profiles.get_active())
+        dialog.get_content_area().add(entry)
+        dialog.show_all()
+        response, name = (dialog.run(), entry.get_text())
+        dialog.destroy()
+        if response == Gtk.ResponseType.OK and name:
+            self.flush_settings()
+            try:
+                self.profiles.save(name)
+            except ValueError, error:
+                self.warn(_('The profile could not be saved'), str(error))
+
     def apply_clicked(self, widget):
         x, y = (self.spin_left.get_value(), self.spin_top.get_value())
         width = self.spin_width.get_value()
         height = self.spin_height.get_value()
-        horizontal = float(self.screen.get_width())
-        vertical = float(self.screen.get_height())
-        # Create matrix scaled and translated.
-        matrix = cairo.Matrix(
-            xx=width / horizontal, yy=height / vertical,
-            x0=x / horizontal, y0=y / vertical)
-        matrix.translate(0.5, 0.5)
-
         i = self.combo_rotation.get_active_iter()
-        radians = math.radians(self.store_rotation.get_value(i, 0))
-        cos, sin = (round(math.cos(radians)), round(math.sin(radians)))
-        matrix = cairo.Matrix(cos, -sin, sin, cos, 0, 0).multiply(matrix)
-        matrix.translate(-0.5, -0.5)
-        matrix = array.array('f', matrix).tolist()
+        rotation = self.store_rotation.get_value(i, 0)
+        arg = (self.screen.get_width(), self.screen.get_height())
+        matrix = transform.get_matrix((x, y, width, height), rotation, *arg)
 
         self.child.delay()
         self.child.set_enum('rotation', self.combo_rotation.get_active())
@@ -277,66 +555,170 @@ class PointerConfig(Gtk.Application):
         arg = map(tuple, self.store_properties)
         self.child.set_value('property', GLib.Variant('a(bs)', arg))
         self.child.set_value('matrix', GLib.Variant('(dddddd)', tuple(matrix)))
+        start = metrics.begin()
         self.child.apply()
+        metrics.end('settings-write', start)
+        if self.settings_source:
+            GLib.source_remove(self.settings_source)
+            self.settings_source = 0
 
-        params = get_params(self.child)
-        device = self.manager.list_devices(Gdk.DeviceType.SLAVE)
-        call_xinput(device, {self.type:params})
+        self.apply_type(self.type, timing.until('apply', self.apply_done))
         self.reset_outline(self.screen)
 
+    def apply_type(self, nick, callback):
+        self.params.invalidate(nick)
+        params = self.params.get(nick)
+        device = self.registry.find((nick,))
+        command = xinput.build_commands(device, {nick:params})
+        self.state.apply(command, callback)
+
+    def rules_changed(self, settings, key):
+        self.registry.set_rules(xinput.get_rules(settings))
+        param = xinput.load_params(self.params)
+        command = xinput.build_commands(self.registry.find(param), param)
+        self.state.apply(command, xinput.print_error)
+
+    def stats_refresh(self):
+        if metrics.changed():
+            self.action_stats.set_state(GLib.Variant('s', metrics.render()))
+        return True
+
+    def get_type(self, nick):
+        if nick in self.settings.list_children():
+            return nick
+        sys.stderr.write('unknown device type ' + nick + '\n')
+
+    def apply_action(self, action, parameter):
+        nick = self.get_type(parameter.get_string())
+        if nick:
+            self.flush_settings()
+            self.apply_type(nick, xinput.print_error)
+
+    def reapply_all_action(self, action, parameter):
+        self.flush_settings()
+        self.state.cache.clear()
+        param = xinput.load_params(self.params)
+        command = xinput.build_commands(self.registry.find(param), param)
+        self.state.apply(command, xinput.print_error)
+
+    def set_bounds_action(self, action, parameter):
+        nick, x, y, width, height = parameter.unpack()
+        if not width or not height:
+            sys.stderr.write('bounds must be at least 1 x 1\n')
+        elif self.get_type(nick):
+            self.flush_settings()
+            child = self.settings.get_child(nick)
+            rotation = transform.ROTATION[child.get_enum('rotation')]
+            arg = (self.screen.get_width(), self.screen.get_height())
+            bounds = (x, y, width, height)
+            matrix = transform.get_matrix(bounds, rotation, *arg)
+            child.delay()
+            child.set_value('bounds', GLib.Variant('(iiuu)', bounds))
+            child.set_value('matrix', GLib.Variant('(dddddd)', matrix))
+            child.apply()
+            self.apply_type(nick, xinput.print_error)
+            if nick == vars(self).get('type'):
+                self.type_changed(self.selection_type)
+
+    def switch_action(self, action, parameter):
+        name = parameter.get_string()
+        if name in self.profiles.get_names():
+            self.switch_profile(name, xinput.print_error)
+        else:
+            sys.stderr.write('unknown profile ' + name + '\n')
+
+    def apply_done(self, error):
+        if error:
+            text = '\n'.join(xinput.format_error(error))
+            self.warn(_('Some devices could not be configured'), text)
+
+    def warn(self, message, text):
+        arg = (vars(self).get('window_main'),
+               Gtk.DialogFlags.DESTROY_WITH_PARENT,
+               Gtk.MessageType.WARNING, Gtk.ButtonsType.CLOSE, message)
+        dialog = Gtk.MessageDialog(*arg)
+        dialog.format_secondary_text(text)
+        dialog.connect('response', self.message_response)
+        dialog.show()
+
+    def message_response(self, dialog, response):
+        dialog.destroy()
+
     def startup(self, application):
+        # the window is built lazily, keep running for the status icon
+        self.hold()
+        start = timing.begin()
         self.display = Gdk.Display.get_default()
         self.manager = self.display.get_device_manager()
         self.screen = Gdk.Screen.get_default()
-        # device-added works in Gdk_test.py but not here
-        # self.manager.connect('device-added', self.device_changed)
-        # self.manager.connect('device-changed', self.device_changed)
-        self.screen.connect('monitors-changed', self.monitors_changed)
-        self.screen.connect('size-changed', self.reset_outline)
-
-        name = 'pointer-config'
-        alt = [GLib.get_user_data_dir()] + list(GLib.get_system_data_dirs())
-        alt = filter(GLib.path_is_absolute, alt)
-        path = [GLib.build_filenamev((p, 'locale')) for p in alt]
-        path = [p for p in path if gettext.find(name, p)] + [None]
-        gettext.bindtextdomain(name, path[0])
-        gettext.textdomain(name)
-        gettext.install(name, path[0])
+        self.backend = xinput.get_backend(self.display)
+        self.state = xinput.State(self.backend)
+        self.screen_source = 0
+        self.screen_size = (self.screen.get_width(), self.screen.get_height())
+        self.screen.connect('monitors-changed', self.screen_changed)
+        self.screen.connect('size-changed', self.screen_changed)
+        timing.end('display', start)
+
+        start = timing.begin()
+        path = get_locale_dir(NAME)
+        gettext.bindtextdomain(NAME, path)
+        gettext.textdomain(NAME)
+        gettext.install(NAME, path)
         _ = gettext.lgettext
         GLib.set_application_name(_('Pointer Config'))
+        timing.end('gettext', start)
 
-        for sub in alt:
-            builder = Gtk.Builder()
-            builder.set_translation_domain(name)
-            path = GLib.build_filenamev((sub, name, name + '.glade'))
-            try:
-                builder.add_from_file(path)
-                break
-            except GLib.GError:
-                pass
+        start = timing.begin()
+        self.glade = None
+        path = os.path.join(os.path.dirname(__file__), NAME + '.gresource')
+        if os.path.exists(path):
+            Gio.resources_register(Gio.Resource.load(path))
         else:
-            sys.exit('failed to load ' + name + '.glade')
-        builder.connect_signals(self)
-
-        self.outline = Outline()
-        obj = ('window_main', 'store_type', 'combo_rotation', 'store_rotation',
-               'check_left', 'spin_left', 'check_top', 'spin_top',
-               'check_width', 'spin_width', 'check_height', 'spin_height',
-               'button_cursor', 'radio_absolute', 'radio_relative',
-               'tree_properties', 'store_properties', 'column_properties',
-               'text_properties', 'selection_properties', 'grid_options',
-               'check_auto', 'check_outline', 'button_colour', 'spin_size',
-               'button_apply', 'dialog_about', 'menu_status')
-        for name in obj:
+            for sub in get_data_dirs():
+                path = GLib.build_filenamev((sub, NAME, NAME + '.glade'))
+                if os.path.exists(path):
+                    self.glade = path
+                    break
+            else:
+                sys.exit('failed to load ' + NAME + '.glade')
+        builder = self.get_builder(TRAY)
+        timing.end('glade', start)
+
+        self.ui = False
+        self.outline_source, self.settings_source = (0, 0)
+        self.capture_device, self.capture_start = (None, None)
+        self.capture_source, self.capture_handler = (0, list())
+        for name in ('status_main', 'menu_status', 'item_profiles',
+                     'menu_profiles'):
             setattr(self, name, builder.get_object(name))
 
+        start = timing.begin()
+        param, rule = xinput.get_setup()
         path = '/pointer-config/'
         self.settings = Gio.Settings(application.get_application_id(), path)
-        param = dict()
-        for key, _ in self.store_type:
-            child = self.settings.get_child(key)
-            if child.get_boolean('auto'):
-                param[key] = get_params(child)
-        call_xinput(self.manager.list_devices(Gdk.DeviceType.SLAVE), param)
-
-        self.add_window(self.window_main)
+        self.params = xinput.ParamCache(self.settings)
+        self.registry = Gdk.Registry(self.manager, rule)
+        self.settings.connect('changed::rules', self.rules_changed)
+        device = self.registry.find(param)
+        command = xinput.build_commands(device, param)
+        timing.end('settings', start)
+        self.state.apply(command, timing.until('apply', xinput.print_error))
+        self.profiles = profile.Profiles(self.settings, self.params)
+        for key in ('changed::profiles', 'changed::profile'):
+            self.settings.connect(key, self.profiles_changed)
+        self.profiles_changed(self.settings, None)
+        GLib.idle_add(self.profiles_prepare)
+        for name, kind in remote.ACTIONS:
+            arg = (name, kind and GLib.VariantType.new(kind))
+            action = Gio.SimpleAction.new(*arg)
+            handler = getattr(self, name.replace('-', '_') + '_action')
+            action.connect('activate', handler)
+            self.add_action(action)
+        if metrics.enabled():
+            arg = ('stats', None, GLib.Variant('s', metrics.render()))
+            self.action_stats = Gio.SimpleAction.new_stateful(*arg)
+            self.add_action(self.action_stats)
+            GLib.timeout_add_seconds(1, self.stats_refresh)
+        delay = self.settings.get_uint('hotplug-delay')
+        arg = (self.manager, self.registry, self.state, self.params, delay)
+        self.hotplug = hotplug.Hotplug(*arg)
@@ -0,0 +1,156 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+
+from pointerconfig import timing
+from pointerconfig import xinput
+from gi.repository import Gio
+
+
+def get_delta(active, target):
+    ''' the part of target that differs from active, as a Param '''
+    matrix = target.matrix if target.matrix != active.matrix else tuple()
+    mode = target.mode if target.mode != active.mode else tuple()
+    prop = tuple(p for p in target.prop if p not in active.prop)
+    return xinput.Param(matrix, mode, prop)
+
+
+class Profiles(object):
+    ''' named copies of every device type under /pointer-config/profiles/ '''
+
+    def __init__(self, settings, params):
+        self.settings, self.params = (settings, params)
+        self.cache = dict()
+
+    def get_names(self):
+        return list(self.settings.get_strv('profiles'))
+
+    def get_active(self):
+        return self.settings.get_string('profile')
+
+    def get_params(self, name):
+        if '/' in name or not name:
+            raise ValueError('invalid profile name ' + repr(name))
+        if name not in self.cache:
+            path = self.settings.get_property('path') + 'profiles/'
+            arg = ('config.Pointer.profile', path + name + '/')
+            settings = Gio.Settings.new_with_path(*arg)
+            self.cache[name] = xinput.ParamCache(settings)
+        return self.cache[name]
+
+    def get_delta(self, name):
+        ''' per automatic type of the profile, what applying it changes '''
+        target, delta = (self.get_params(name), dict())
+        for nick in self.settings.list_children():
+            if not target.get_child(nick).get_boolean('auto'):
+                continue
+            delta[nick] = target.get(nick)
+            # a type that was not automatic may never have been applied
+            if self.params.get_child(nick).get_boolean('auto'):
+                delta[nick] = get_delta(self.params.get(nick), delta[nick])
+        return delta
+
+    def prepare(self):
+        for name in self.get_names():
+            self.get_delta(name)
+
+    def copy(self, source, target):
+        for nick in self.settings.list_children():
+            child, other = (target.get_child(nick), source.get_child(nick))
+            child.delay()
+            for key in child.list_keys():
+                value = other.get_value(key)
+                if value != child.get_value(key):
+                    child.set_value(key, value)
+            child.apply()
+
+    def save(self, name):
+        self.copy(self.params, self.get_params(name))
+        name_list = self.get_names()
+        if name not in name_list:
+            self.settings.set_strv('profiles', name_list + [name])
+        self.settings.set_string('profile', name)
+
+    def delete(self, name):
+        cache = self.get_params(name)
+        for nick in self.settings.list_children():
+            child = cache.get_child(nick)
+            for key in child.list_keys():
+                child.reset(key)
+        name_list = self.get_names()
+        if name in name_list:
+            name_list.remove(name)
+            self.settings.set_strv('profiles', name_list)
+        if self.get_active() == name:
+            self.settings.set_string('profile', '')
+
+    def switch(self, name, entry, state, callback):
+        ''' apply only what differs from the active settings, then store '''
+        if name not in self.get_names():
+            raise ValueError('unknown profile ' + name)
+        command = xinput.build_commands(entry, self.get_delta(name))
+        self.copy(self.get_params(name), self.params)
+        self.settings.set_string('profile', name)
+        state.apply(command, callback)
+
+
+def get_profiles():
+    settings = Gio.Settings('config.Pointer', '/pointer-config/')
+    return Profiles(settings, xinput.ParamCache(settings))
+
+
+def run_list():
+    profiles = get_profiles()
+    for name in profiles.get_names():
+        print ('* ' if name == profiles.get_active() else '  ') + name
+    return 0
+
+
+def run_save(name):
+    try:
+        get_profiles().save(name)
+    except ValueError, error:
+        sys.exit(str(error))
+    Gio.Settings.sync()
+    return 0
+
+
+def run_delete(name):
+    try:
+        get_profiles().delete(name)
+    except ValueError, error:
+        sys.exit(str(error))
+    Gio.Settings.sync()
+    return 0
+
+
+def run_switch(name):
+    with timing.phase('display'):
+        display = xinput.get_display()
+    with timing.phase('switch'):
+        profiles = get_profiles()
+        state = xinput.State(xinput.get_backend(display))
+        rule = xinput.get_rules(profiles.settings)
+        entry = xinput.get_entries(xinput.get_devices(display), rule)
+        try:
+            error = xinput.wait(profiles.switch, name, entry, state)
+        except ValueError, error:
+            sys.exit(str(error))
+    Gio.Settings.sync()
+    xinput.print_error(error)
+    return int(bool(error))
@@ -0,0 +1,96 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+
+from pointerconfig import timing
+from gi.repository import Gio
+from gi.repository import GLib
+
+NAME = 'config.Pointer'
+PATH = '/config/Pointer'
+TIMEOUT = 5000
+RANGE = {'i': (-2 ** 31, 2 ** 31 - 1), 'u': (0, 2 ** 32 - 1)}
+
+# exported by the running instance, with their parameter types
+ACTIONS = (('apply', 's'), ('reapply-all', None),
+           ('set-bounds', '(siiuu)'), ('switch', 's'))
+
+
+def get_parameter(name, arg):
+    kind = dict(ACTIONS).get(name, False)
+    if kind is False:
+        raise ValueError('unknown action ' + name)
+    code = (kind or '').strip('()')
+    if len(arg) != len(code):
+        raise ValueError('%s takes %d arguments' % (name, len(code)))
+    value = [a if c == 's' else int(a) for c, a in zip(code, arg)]
+    for c, v in zip(code, value):
+        low, high = RANGE.get(c, (v, v))
+        if not low <= v <= high:
+            raise ValueError('%s: %d is not in %d..%d' % (name, v, low, high))
+    if not kind:
+        return None
+    if kind.startswith('('):
+        return GLib.Variant(kind, tuple(value))
+    return GLib.Variant(kind, value[0])
+
+
+def call(name, parameter=None):
+    ''' activate an action of the running instance, without starting one '''
+    connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    parameter = [] if parameter is None else [parameter]
+    arg = GLib.Variant('(sava{sv})', (name, parameter, {}))
+    connection.call_sync(NAME, PATH, 'org.gtk.Actions', 'Activate', arg,
+                         None, Gio.DBusCallFlags.NO_AUTO_START, TIMEOUT,
+                         None)
+
+
+def get_state(name):
+    connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    arg = GLib.Variant('(s)', (name,))
+    reply = connection.call_sync(NAME, PATH, 'org.gtk.Actions', 'Describe',
+                                 arg, GLib.VariantType.new('((bgav))'),
+                                 Gio.DBusCallFlags.NO_AUTO_START, TIMEOUT,
+                                 None)
+    enabled, kind, state = reply.unpack()[0]
+    return state[0] if state else None
+
+
+def run_stats():
+    try:
+        sys.stdout.write(get_state('stats'))
+    except GLib.GError, error:
+        if 'ServiceUnknown' in error.message:
+            sys.exit('pointer-config is not running')
+        sys.exit('metrics are not enabled in the running instance')
+    return 0
+
+
+def run_remote(arg):
+    try:
+        parameter = get_parameter(arg[0], arg[1:])
+    except ValueError, error:
+        sys.exit(str(error))
+    with timing.phase('remote'):
+        try:
+            call(arg[0], parameter)
+        except GLib.GError, error:
+            if 'ServiceUnknown' in error.message:
+                sys.exit('pointer-config is not running')
+            sys.exit(error.message)
+    return 0
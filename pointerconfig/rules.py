@@ -0,0 +1,57 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import fnmatch
+import re
+
+# devices that are never configured, ahead of any stored rule
+BUILTIN = (('Virtual core XTEST pointer', '', '', ''),
+           ('Virtual core XTEST keyboard', '', '', ''))
+
+_glob = re.compile(r'[*?[]')
+
+
+class Rules(object):
+    ''' (name glob, vendor id, source, type) rules, the first match wins '''
+
+    def __init__(self, rule=()):
+        self.rule = list(BUILTIN) + [tuple(r) for r in rule]
+        self.exact, self.pattern = (dict(), list())
+        for i, (name, vendor, source, target) in enumerate(self.rule):
+            if name and not _glob.search(name):
+                self.exact.setdefault(name, list()).append(i)
+            elif name and name != '*':
+                match = re.compile(fnmatch.translate(name)).match
+                self.pattern.append((i, match))
+            else:
+                self.pattern.append((i, None))
+
+    def match(self, name, source, vendor=None):
+        ''' the device type for a device, vendor may be a callable '''
+        index = [i for i, match in self.pattern if not match or match(name)]
+        index += self.exact.get(name, list())
+        for i in sorted(index):
+            _, want, nick, target = self.rule[i]
+            if nick and nick != source:
+                continue
+            if want:
+                if callable(vendor):
+                    vendor = vendor()
+                if (vendor or '').lower() != want.lower():
+                    continue
+            return target
+        return source
@@ -0,0 +1,111 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import atexit
+import json
+import os
+import sys
+
+from pointerconfig import metrics
+from gi.repository import GLib
+
+_origin = GLib.get_monotonic_time()
+_phase = list()
+_count = dict()
+_path = None
+
+
+class _Phase(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = begin()
+
+    def __exit__(self, kind, value, traceback):
+        end(self.name, self.start)
+
+
+class _Nothing(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, kind, value, traceback):
+        pass
+
+
+_nothing = _Nothing()
+
+
+def enable(path):
+    global _path
+    if not _path:
+        atexit.register(dump)
+    _path = path
+
+
+def begin():
+    return GLib.get_monotonic_time() if _path else 0
+
+
+def end(name, start):
+    if _path:
+        _phase.append((name, start, GLib.get_monotonic_time() - start))
+
+
+def phase(name):
+    return _Phase(name) if _path else _nothing
+
+
+def until(name, callback):
+    if not _path:
+        return callback
+    start = begin()
+
+    def done(*arg):
+        end(name, start)
+        return callback(*arg)
+    return done
+
+
+def count(name, number=1):
+    metrics.count(name, number)
+    if _path:
+        _count[name] = _count.get(name, 0) + number
+
+
+def report():
+    phase = [{'name': name, 'start': (start - _origin) / 1000.0,
+              'duration': duration / 1000.0}
+             for name, start, duration in _phase]
+    return {'pid': os.getpid(), 'argv': sys.argv, 'phase': phase,
+            'count': _count}
+
+
+def dump():
+    line = json.dumps(report(), sort_keys=True) + '\n'
+    if _path == '-':
+        sys.stderr.write(line)
+    else:
+        with open(_path, 'a') as output:
+            output.write(line)
+
+
+if os.environ.get('POINTER_CONFIG_TIMING'):
+    enable(os.environ['POINTER_CONFIG_TIMING'])
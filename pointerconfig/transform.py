@@ -0,0 +1,59 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Matrices are (xx, yx, xy, yy, x0, y0) tuples in cairo.Matrix order, the
+# order of the matrix settings key.
+
+import math
+
+# degrees of the config.Pointer.rotation enum values
+ROTATION = (0, 90, 270, 180)
+
+_turn = dict((degree, (int(round(math.cos(math.radians(degree)))),
+                       int(round(math.sin(math.radians(degree))))))
+             for degree in (0, 90, 180, 270))
+
+
+def get_matrices(bounds, rotation, width, height):
+    ''' matrix for every (bounds, rotation) pair on a width x height screen '''
+    width, height = (float(width), float(height))
+    scale, matrix = (list(), dict())
+    for b in bounds:
+        x, y, w, h = b
+        scale.append((b, w / width, h / height, x / width, y / height))
+    for degree in rotation:
+        cos, sin = _turn[degree % 360]
+        dx, dy = (0.5 - 0.5 * cos - 0.5 * sin, 0.5 + 0.5 * sin - 0.5 * cos)
+        for b, sx, sy, tx, ty in scale:
+            matrix[b, degree] = (sx * cos, -sy * sin, sx * sin, sy * cos,
+                                 sx * dx + tx, sy * dy + ty)
+    return matrix
+
+
+def get_matrix(bounds, rotation, width, height):
+    key = (tuple(bounds), rotation)
+    return get_matrices((key[0],), (rotation,), width, height)[key]
+
+
+def get_bounds(matrix, width, height):
+    ''' pixel (x, y, width, height) covered by a matrix, at least 1 x 1 '''
+    xx, yx, xy, yy, x0, y0 = matrix
+    x, y = (round(x0 * width), round(y0 * height))
+    x2 = round((xx + xy + x0) * width)
+    y2 = round((yx + yy + y0) * height)
+    return (int(min(x, x2)), int(min(y, y2)),
+            int(max(abs(x - x2), 1)), int(max(abs(y - y2), 1)))
@@ -0,0 +1,489 @@
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import collections
+import os
+import re
+import shlex
+import sys
+
+from pointerconfig import Gdk
+from pointerconfig import metrics
+from pointerconfig import plan
+from pointerconfig import rules
+from pointerconfig import timing
+from pointerconfig.Gdk import GdkX11
+from gi.repository import Gio
+from gi.repository import GLib
+
+
+Param = collections.namedtuple('Param', ('matrix', 'mode', 'prop'))
+
+
+def compile_matrix(value):
+    matrix = list(value)
+    matrix = matrix[0::2] + matrix[1::2] + [0, 0, 1]
+    return tuple(['Coordinate Transformation Matrix'] + map(str, matrix))
+
+
+def compile_mode(value):
+    return (('ABSOLUTE', 'RELATIVE')[value],)
+
+
+def compile_property(value):
+    return tuple(tuple(shlex.split(p)) for a, p in value if a)
+
+
+def get_params(schema):
+    matrix = compile_matrix(schema.get_value('matrix'))
+    mode = compile_mode(schema.get_enum('mode'))
+    prop = compile_property(schema.get_value('property'))
+    return Param(matrix, mode, prop)
+
+
+class ParamCache(object):
+    ''' get_params per device type, recompiled only for changed keys '''
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.child, self.field, self.param = (dict(), dict(), dict())
+
+    def get_child(self, nick):
+        if nick not in self.child:
+            self.child[nick] = self.settings.get_child(nick)
+            self.child[nick].connect('changed', self.changed, nick)
+        return self.child[nick]
+
+    def get(self, nick):
+        if nick not in self.param:
+            child = self.get_child(nick)
+            arg = (('matrix', child.get_value, compile_matrix),
+                   ('mode', child.get_enum, compile_mode),
+                   ('property', child.get_value, compile_property))
+            for key, read, convert in arg:
+                if (nick, key) not in self.field:
+                    self.field[nick, key] = convert(read(key))
+            field = [self.field[nick, key] for key, read, convert in arg]
+            self.param[nick] = Param(*field)
+        return self.param[nick]
+
+    def changed(self, settings, key, nick):
+        if (nick, key) in self.field:
+            del self.field[nick, key]
+            self.param.pop(nick, None)
+
+    def invalidate(self, nick):
+        for key in ('matrix', 'mode', 'property'):
+            self.changed(None, key, nick)
+
+
+class Xinput(object):
+    ''' fallback backend, one xinput process per command '''
+
+    reads_mode = False
+
+    def __init__(self, display=None):
+        self.display = display
+
+    def spawn(self, argv, flag):
+        launcher = Gio.SubprocessLauncher.new(flag)
+        if self.display:
+            launcher.setenv('DISPLAY', self.display, True)
+        return launcher.spawnv(argv)
+
+    def call(self, command, callback, timeout, error):
+        flag = Gio.SubprocessFlags.NONE
+        # xinput takes --type= and --format= before the device
+        option, arg = split_options(command[2:])
+        command = command[:1] + option + command[1:2] + arg
+        try:
+            process = self.spawn(['xinput'] + command, flag)
+        except GLib.GError, error:
+            return GLib.idle_add(callback, error.message)
+        timing.count('spawn')
+        cancellable = Gio.Cancellable()
+        source = GLib.timeout_add(timeout, self.expire, process, cancellable)
+        data = (callback, source, cancellable)
+        process.wait_check_async(cancellable, self.finish, data)
+
+    def expire(self, process, cancellable):
+        cancellable.cancel()
+        process.force_exit()
+        return False
+
+    def finish(self, process, result, data):
+        callback, source, cancellable = data
+        if cancellable.is_cancelled():
+            return callback('timed out')
+        GLib.source_remove(source)
+        try:
+            process.wait_check_finish(result)
+        except GLib.GError, error:
+            return callback(error.message)
+        callback(None)
+
+    def read(self, query, callback, timeout):
+        flag = Gio.SubprocessFlags.STDOUT_PIPE
+        flag |= Gio.SubprocessFlags.STDERR_SILENCE
+        xid = sorted(query)
+        try:
+            arg = ['xinput', 'list-props'] + map(str, xid)
+            process = self.spawn(arg, flag)
+        except GLib.GError:
+            return GLib.idle_add(callback, dict())
+        timing.count('spawn')
+        cancellable = Gio.Cancellable()
+        source = GLib.timeout_add(timeout, self.expire, process, cancellable)
+        data = (xid, query, callback, source, cancellable)
+        process.communicate_utf8_async(None, cancellable, self.parse, data)
+
+    def parse(self, process, result, data):
+        xid, query, callback, source, cancellable = data
+        if cancellable.is_cancelled():
+            return callback(dict())
+        GLib.source_remove(source)
+        try:
+            _, output, _ = process.communicate_utf8_finish(result)
+        except GLib.GError:
+            return callback(dict())
+        current, device = (dict(), list())
+        for line in output.splitlines():
+            if line.startswith('Device '):
+                device.append(dict())
+            match = _property.match(line)
+            if device and match and match.group(2) != '<no items>':
+                value = _value.findall(match.group(2))
+                value = tuple(a or b.strip() for a, b in value)
+                device[-1][match.group(1)] = value
+        if len(device) == len(xid):
+            for i, prop in zip(xid, device):
+                for name in query[i] & set(prop):
+                    current[i, name] = prop[name]
+        callback(current)
+
+    def flush(self, error):
+        return error
+
+
+_property = re.compile(r'\s+(.+) \(\d+\):\s*(.*)$')
+_value = re.compile(r'\s*(?:"([^"]*)"(?: \(\d+\))?|([^,]+))')
+
+
+def get_backend(display, name=None):
+    if os.environ.get('POINTER_CONFIG_BACKEND', 'xi') == 'xi':
+        try:
+            from pointerconfig import Xi
+        except OSError:
+            return Xinput(name)
+        xdisplay = GdkX11.gdk_x11_display_get_xdisplay(display)
+        return Xi.Backend(Xi.Display(xdisplay))
+    return Xinput(name)
+
+
+def get_entries(device, rule=None):
+    entry, rule = (list(), rule or rules.Rules())
+    for obj in device:
+        name, source = (obj.get_name(), obj.get_source().value_nick)
+        nick = rule.match(name, source, obj.get_vendor_id)
+        entry.append((GdkX11.gdk_x11_device_get_id(obj), name, nick))
+    return entry
+
+
+def get_commands(device, setup, rule=None):
+    return build_commands(get_entries(device, rule), setup)
+
+
+def build_commands(entry, setup):
+    command = list()
+    for xid, name, nick in entry:
+        matrix, mode, prop = setup.get(nick, (False, False, tuple()))
+        xid = [str(xid)]
+        if matrix:
+            command.append(['set-prop'] + xid + list(matrix))
+        if mode:
+            command.append(['set-mode'] + xid + list(mode))
+        for param in prop:
+            command.append(['set-prop'] + xid + list(param))
+    return command
+
+
+class Pipeline(object):
+    ''' run commands on the main loop, devices in parallel up to limit '''
+
+    limit = 4
+    timeout = 5000
+
+    def __init__(self, backend, command, callback):
+        self.backend, self.callback = (backend, callback)
+        self.device, self.error, self.running = (list(), dict(), 0)
+        self.trapped = dict()
+        for param in command:
+            xid = int(param[1])
+            if not self.device or self.device[-1][0] != xid:
+                self.device.append((xid, list()))
+            self.device[-1][1].append(param)
+
+    def start(self):
+        for _ in range(self.limit):
+            self.next()
+        return self
+
+    def next(self):
+        if self.device:
+            self.running += 1
+            self.step(*self.device.pop(0))
+        elif not self.running and self.callback:
+            callback, self.callback = (self.callback, None)
+            trapped = self.backend.flush(self.trapped)
+            for xid, message in trapped.items():
+                self.error.setdefault(xid, list()).extend(message)
+            callback(self.error)
+
+    def step(self, xid, command):
+        if not command:
+            self.running -= 1
+            return self.next()
+
+        def done(error):
+            if error:
+                self.error.setdefault(xid, list()).append(error)
+            self.step(xid, command)
+        self.backend.call(command.pop(0), done, self.timeout, self.trapped)
+
+
+def wait(function, *arg):
+    loop, result = (GLib.MainLoop(), list())
+
+    def done(value):
+        result.append(value)
+        loop.quit()
+    function(*(arg + (done,)))
+    if not result:
+        loop.run()
+    return result[0]
+
+
+def run_pipeline(command, backend, callback=None):
+    if callback is None:
+        return wait(run_pipeline, command, backend)
+    callback = metrics.until('pipeline', callback)
+    return Pipeline(backend, command, callback).start()
+
+
+def call_xinput(device, setup, backend=None, callback=None):
+    command = get_commands(device, setup)
+    return run_pipeline(command, backend or Xinput(), callback)
+
+
+def split_options(arg):
+    ''' leading --type= and --format= options, and the rest '''
+    option = list()
+    while arg and arg[0].startswith('--'):
+        option, arg = (option + [arg[0]], arg[1:])
+    return (option, list(arg))
+
+
+def split_command(command):
+    if command[0] == 'set-mode':
+        return ((int(command[1]), None), tuple(command[2:]))
+    option, arg = split_options(command[2:])
+    return ((int(command[1]), arg[0]), tuple(arg[1:]))
+
+
+def same_value(current, value):
+    if current is None or len(current) != len(value):
+        return False
+    for a, b in zip(current, value):
+        if a != b:
+            try:
+                a, b = (float(a), float(b))
+            except ValueError:
+                return False
+            if abs(a - b) > 1e-5 * max(1, abs(a), abs(b)):
+                return False
+    return True
+
+
+class State(object):
+    ''' last applied device values, used to skip writes that change nothing '''
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.cache = dict()
+
+    def forget(self, xid):
+        for key in [k for k in self.cache if k[0] == xid]:
+            del self.cache[key]
+
+    def read(self, command, callback, check=False):
+        query = dict()
+        for key, value in map(split_command, command):
+            if key[1] is None and not self.backend.reads_mode:
+                continue
+            if check or not same_value(self.cache.get(key), value):
+                query.setdefault(key[0], set()).add(key[1])
+        if not query:
+            return callback(list())
+
+        def done(current):
+            self.cache.update(current)
+            todo = list()
+            for param in command:
+                key, value = split_command(param)
+                if not same_value(self.cache.get(key), value):
+                    todo.append(param)
+            callback(todo)
+        self.backend.read(query, done, Pipeline.timeout)
+
+    def apply(self, command, callback):
+        start = metrics.begin()
+
+        def done(todo):
+            run_pipeline(todo, self.backend, lambda e: finish(todo, e))
+
+        def finish(todo, error):
+            for key, value in map(split_command, todo):
+                self.cache[key] = value
+            for xid in error:
+                self.forget(xid)
+            metrics.end('apply', start)
+            metrics.count('write', len(todo))
+            metrics.count('apply-error', len(error))
+            callback(error)
+        self.read(command, done)
+
+    def check(self, command, callback):
+        def done(todo):
+            drift = dict()
+            for key, value in map(split_command, todo):
+                if key[1] is None and not self.backend.reads_mode:
+                    continue
+                name = key[1] or 'mode'
+                drift.setdefault(key[0], list()).append(name + ' differs')
+            callback(drift)
+        self.read(command, done, True)
+
+
+def format_error(error):
+    return ['device %d: %s' % (xid, message)
+            for xid in sorted(error) for message in error[xid]]
+
+
+def print_error(error):
+    for line in format_error(error):
+        sys.stderr.write(line + '\n')
+
+
+def get_display():
+    Gdk.init_check(list())
+    display = Gdk.Display.get_default()
+    if not display:
+        sys.exit('cannot open display')
+    return display
+
+
+def load_params(cache, nick=None):
+    param, children = (dict(), cache.settings.list_children())
+    for key in nick or children:
+        if key not in children:
+            sys.exit('unknown device type ' + key)
+        if nick or cache.get_child(key).get_boolean('auto'):
+            param[key] = cache.get(key)
+    return param
+
+
+def get_rules(settings):
+    return rules.Rules(settings.get_value('rules'))
+
+
+def get_setup(nick=None):
+    key = plan.get_key()
+    saved = plan.load(nick, key)
+    if saved is not None:
+        timing.count('plan')
+        setup, rule = saved
+        setup = dict((n, Param(*value)) for n, value in setup.items())
+        return (setup, rules.Rules(rule))
+    settings = Gio.Settings('config.Pointer', '/pointer-config/')
+    cache = ParamCache(settings)
+    setup = load_params(cache, nick)
+    plan.save(cache, key)
+    return (setup, get_rules(settings))
+
+
+def get_devices(display):
+    return display.get_device_manager().list_devices(Gdk.DeviceType.SLAVE)
+
+
+def run_apply(nick=None):
+    with timing.phase('display'):
+        display = get_display()
+    with timing.phase('settings'):
+        param, rule = get_setup(nick)
+    with timing.phase('apply'):
+        state = State(get_backend(display))
+        command = get_commands(get_devices(display), param, rule)
+        error = wait(state.apply, command)
+    print_error(error)
+    return int(bool(error))
+
+
+def run_check(nick=None):
+    with timing.phase('display'):
+        display = get_display()
+    with timing.phase('settings'):
+        param, rule = get_setup(nick)
+    with timing.phase('check'):
+        state = State(get_backend(display))
+        command = get_commands(get_devices(display), param, rule)
+        drift = wait(state.check, command)
+    for line in format_error(drift):
+        print line
+    return int(bool(drift))
+
+
+def run_displays(names, nick=None, check=False):
+    ''' apply or check every display at once, each failing on its own '''
+    names = sorted(set(names), key=names.index)
+    Gdk.init_check(list())
+    with timing.phase('settings'):
+        param, rule = get_setup(nick)
+    loop, result = (GLib.MainLoop(), dict())
+
+    def done(name, start, error):
+        timing.end('display ' + name, start)
+        result[name] = format_error(error)
+        if len(result) == len(names):
+            loop.quit()
+    for name in names:
+        start = timing.begin()
+        display = Gdk.Display.open(name)
+        if not display:
+            timing.end('display ' + name, start)
+            result[name] = ['cannot open display']
+            continue
+        state = State(get_backend(display, name))
+        command = get_commands(get_devices(display), param, rule)
+        method = state.check if check else state.apply
+        method(command, lambda error, n=name, s=start: done(n, s, error))
+    if len(result) < len(names):
+        loop.run()
+    output = sys.stdout if check else sys.stderr
+    for name in names:
+        for line in result[name]:
+            output.write('%s: %s\n' % (name, line))
+    return int(any(result.values()))
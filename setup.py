@@ -39,8 +39,12 @@ try:
     subprocess.call(('intltool-merge', '-d', 'i18n', path + '.in', path))
     path = os.path.join('applications', 'pointer-config.desktop')
     subprocess.call(('intltool-merge', '-d', 'i18n', path + '.in', path))
+    path = os.path.join(NAME, NAME + '.gresource.xml')
+    output = os.path.join('pointerconfig', NAME + '.gresource')
+    subprocess.call(('glib-compile-resources', '--sourcedir', NAME,
+                     '--target', output, path))
 except OSError:
-    sys.exit('msgfmt or intltool-merge missing')
+    sys.exit('msgfmt, intltool-merge or glib-compile-resources missing')
 
 conf = filter(GLib.path_is_absolute, GLib.get_system_config_dirs())[0]
 data = filter(GLib.path_is_absolute, GLib.get_system_data_dirs())[0]
@@ -62,5 +66,6 @@ setup(
     description='Basic configurion for pointer devices using GTK+ and XInput',
     author='Daniel Miedzyblocki',
     packages=('pointerconfig',),
+    package_data={'pointerconfig': (NAME + '.gresource',)},
     scripts=('/'.join(('script', NAME)),),
     data_files=data_file)
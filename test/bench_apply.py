@@ -0,0 +1,163 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Apply latency and xinput spawns per apply as the number of devices and
+# properties grows, using fake devices and a stub xinput, without a display.
+# Results above test/bench_baseline.json by more than the tolerance fail the
+# run; --update records the current results as the baseline instead.
+# --xvfb also times pointer-config --apply against a private Xvfb server.
+# usage: bench_apply.py [--update] [--xvfb] [--tolerance 1.5] [--repeat 5]
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import fake
+
+top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tmp = fake.compile_schemas()
+os.environ.update(GSETTINGS_BACKEND='memory', GSETTINGS_SCHEMA_DIR=tmp)
+os.environ['PATH'] = tmp + os.pathsep + os.environ['PATH']
+
+from pointerconfig import timing
+from pointerconfig import xinput
+from pointerconfig.Gdk import DeviceType
+from gi.repository import Gio
+from gi.repository import GLib
+
+DEVICES = (1, 8, 64)
+PROPERTIES = (0, 4, 16)
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--update', action='store_true')
+parser.add_argument('--xvfb', action='store_true')
+parser.add_argument('--tolerance', type=float, default=1.5)
+parser.add_argument('--repeat', type=int, default=5)
+parser.add_argument('--baseline',
+                    default=os.path.join(top, 'test', 'bench_baseline.json'))
+arg = parser.parse_args()
+
+fake.install()
+log = os.path.join(tmp, 'log')
+fake.write_xinput(tmp, log)
+timing.enable(os.devnull)
+settings = Gio.Settings('config.Pointer', '/pointer-config/')
+
+
+def spawns():
+    return timing.report()['count'].get('spawn', 0)
+
+
+def set_properties(number):
+    value = [(True, "'Fake Property %d' %d" % (i, i)) for i in range(number)]
+    for nick in fake.SOURCE:
+        child = settings.get_child(nick)
+        child.set_value('property', GLib.Variant('a(bs)', value))
+
+
+def median(function, repeat):
+    result = sorted(function() for _ in range(repeat))
+    return result[len(result) / 2]
+
+
+def clock(function, *arg):
+    def run():
+        start = time.time()
+        function(*arg)
+        return (time.time() - start) * 1000
+    return run
+
+
+def measure(devices, properties):
+    result, manager = (dict(), fake.Manager(devices))
+    set_properties(properties)
+    device = manager.list_devices(DeviceType.SLAVE)
+    cache = xinput.ParamCache(settings)
+
+    def params():
+        cache.param.clear()
+        cache.field.clear()
+        return xinput.load_params(cache, fake.SOURCE)
+    param = params()
+    command = xinput.get_commands(device, param)
+    result['params ms'] = median(clock(params), arg.repeat)
+    result['commands ms'] = median(
+        clock(xinput.get_commands, device, param), arg.repeat)
+
+    def apply(state):
+        error = xinput.wait(state.apply, command)
+        if error:
+            sys.exit('\n'.join(xinput.format_error(error)))
+    state, first = (xinput.State(xinput.Xinput()), spawns())
+    result['apply ms'] = clock(apply, state)()
+    result['apply spawns'] = spawns() - first
+    first = spawns()
+    result['reapply ms'] = median(clock(apply, state), arg.repeat)
+    result['reapply spawns'] = (spawns() - first) / arg.repeat
+    return result
+
+
+def measure_startup():
+    name = ':95'
+    env = dict(os.environ, DISPLAY=name, POINTER_CONFIG_BACKEND='xinput',
+               PYTHONPATH=top)
+    command = [sys.executable, os.path.join(top, 'script', 'pointer-config'),
+               '--apply', '--type', ','.join(fake.SOURCE)]
+    server = fake.start_xvfb(name)
+    try:
+        return median(clock(subprocess.call, command, env=env), arg.repeat)
+    finally:
+        fake.stop_xvfb(server)
+
+
+try:
+    result = dict()
+    for devices in DEVICES:
+        for properties in PROPERTIES:
+            for key, value in measure(devices, properties).items():
+                result['%s %d devices %d properties' % (
+                    key, devices, properties)] = value
+    if arg.xvfb:
+        result['startup ms'] = measure_startup()
+finally:
+    shutil.rmtree(tmp)
+
+baseline = dict()
+if os.path.exists(arg.baseline):
+    baseline = json.load(open(arg.baseline))
+failed = 0
+for key in sorted(result):
+    limit = baseline.get(key)
+    if limit is not None and ' ms' in key:
+        limit *= arg.tolerance
+    mark = ''
+    if limit is not None and result[key] > limit:
+        mark, failed = ('  regression, baseline %g' % baseline[key], 1)
+    print '%-40s %10.3f%s' % (key, result[key], mark)
+if arg.update:
+    baseline.update(result)
+    with open(arg.baseline, 'w') as output:
+        json.dump(baseline, output, indent=1, sort_keys=True)
+        output.write('\n')
+    failed = 0
+sys.exit(failed)
@@ -0,0 +1,55 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compare the xinput and libXi backends against a private Xvfb server.
+# usage: bench_backend.py [applies] [display]
+
+import os
+import subprocess
+import sys
+import time
+
+import fake
+from pointerconfig import Xi
+from pointerconfig.xinput import Xinput
+from pointerconfig.xinput import run_pipeline
+
+applies = int((sys.argv[1:] or ['50'])[0])
+name = (sys.argv[2:] or [':97'])[0]
+server = fake.start_xvfb(name)
+os.environ['DISPLAY'] = name
+try:
+    arg = ['xinput', 'list', '--id-only', 'Virtual core XTEST pointer']
+    xid = subprocess.check_output(arg).strip()
+    matrix = ['Coordinate Transformation Matrix']
+    matrix += ['1', '0', '0', '0', '1', '0', '0', '0', '1']
+    command = [['set-prop', xid] + matrix,
+               ['set-prop', xid, 'Device Enabled', '1']]
+
+    display = Xi.Display.open(name)
+    for backend in (Xinput(), Xi.Backend(display)):
+        start = time.time()
+        for _ in range(applies):
+            error = run_pipeline([list(c) for c in command], backend)
+        elapsed = (time.time() - start) / applies
+        print '%-8s %8.3f ms/apply %s' % (
+            type(backend).__name__, elapsed * 1000, error or '')
+    display.close()
+finally:
+    fake.stop_xvfb(server)
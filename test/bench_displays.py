@@ -0,0 +1,71 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# pointer-config --apply --displays against several private Xvfb servers,
+# against one --apply per display in sequence. One display name is never
+# started, so its failure must be reported without affecting the others.
+# usage: bench_displays.py [servers] [runs] [backend]
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import fake
+
+servers = int((sys.argv[1:] or ['4'])[0])
+runs = int((sys.argv[2:] or ['5'])[0])
+backend = (sys.argv[3:] or ['xi'])[0]
+top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tmp = fake.compile_schemas()
+env = dict(os.environ, GSETTINGS_BACKEND='memory', GSETTINGS_SCHEMA_DIR=tmp,
+           POINTER_CONFIG_BACKEND=backend, PYTHONPATH=top)
+env.pop('DISPLAY', None)
+script = [sys.executable, os.path.join(top, 'script', 'pointer-config'),
+          '--apply', '--type', 'mouse,pen,eraser,cursor,touchscreen,touchpad']
+name = [':%d' % (80 + i) for i in range(servers)]
+missing = ':%d' % (80 + servers)
+
+
+def median(command, code=0):
+    result = list()
+    for _ in range(runs):
+        start = time.time()
+        for c in command:
+            if subprocess.call(c, env=env) != code:
+                sys.exit('unexpected exit status from ' + ' '.join(c))
+        result.append(time.time() - start)
+    return sorted(result)[runs / 2] * 1000
+
+
+server = list()
+try:
+    for n in name:
+        server.append(fake.start_xvfb(n))
+    sequence = [script + ['--displays', n] for n in name]
+    print 'sequential %8.1f ms for %d displays' % (median(sequence), servers)
+    command = [script + ['--displays', ','.join(name)]]
+    print 'concurrent %8.1f ms for %d displays' % (median(command), servers)
+    command = [script + ['--displays', ','.join(name + [missing])]]
+    print 'one failed %8.1f ms, exit status 1' % median(command, 1)
+finally:
+    for s in server:
+        fake.stop_xvfb(s)
+    shutil.rmtree(tmp)
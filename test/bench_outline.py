@@ -0,0 +1,66 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Count the X requests each outline backend sends for the same edits, run
+# under Xvfb, for example: xvfb-run python test/bench_outline.py [updates]
+
+import sys
+import time
+
+import cairo
+from pointerconfig import Gdk
+from pointerconfig import Xi
+from pointerconfig.Gdk import GdkX11
+from pointerconfig.pointer_config import Outline
+from pointerconfig.pointer_config import SurfaceOutline
+from gi.repository import Gtk
+
+updates = int((sys.argv[1:] or ['200'])[0])
+display = Gdk.Display.get_default()
+xdisplay = Xi.Display(GdkX11.gdk_x11_display_get_xdisplay(display))
+screen = Gdk.Screen.get_default()
+width, height = (screen.get_width(), screen.get_height())
+
+
+def settle():
+    while Gtk.events_pending():
+        Gtk.main_iteration()
+
+
+for outline in (Outline(), SurfaceOutline()):
+    outline.transform(cairo.Matrix(xx=0.5, yy=0.5), width, height)
+    outline.resize(5)
+    outline.show_all()
+    outline.move(5)
+    settle()
+    first, start = (xdisplay.next_request(), time.time())
+    for i in range(updates):
+        outline.transform(cairo.Matrix(xx=0.5, yy=0.5, x0=i / 1000.0),
+                          width, height)
+        outline.resize(1 + i % 10)
+        outline.move(1 + i % 10)
+        if not i % 20:
+            rgba = Gdk.RGBA(i % 2, 0.5, 0.5, 1)
+            outline.override_background_color(Gtk.StateFlags.NORMAL, rgba)
+        settle()
+    request = xdisplay.next_request() - first
+    elapsed = (time.time() - start) / updates
+    print '%-14s %6.1f requests/update %8.3f ms/update' % (
+        type(outline).__name__, float(request) / updates, elapsed * 1000)
+    outline.hide()
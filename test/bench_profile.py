@@ -0,0 +1,94 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Profile switch latency and xinput spawns against a full apply, with fake
+# devices and a stub xinput, without a display. The two profiles differ in
+# the pen matrix only.
+# usage: bench_profile.py [devices] [switches]
+
+import os
+import shutil
+import sys
+import time
+
+import fake
+
+tmp = fake.compile_schemas()
+os.environ.update(GSETTINGS_BACKEND='memory', GSETTINGS_SCHEMA_DIR=tmp)
+os.environ['PATH'] = tmp + os.pathsep + os.environ['PATH']
+
+from pointerconfig import profile
+from pointerconfig import timing
+from pointerconfig import xinput
+from pointerconfig.Gdk import DeviceType
+from gi.repository import Gio
+from gi.repository import GLib
+
+devices = int((sys.argv[1:] or ['32'])[0])
+switches = int((sys.argv[2:] or ['20'])[0])
+fake.install()
+fake.write_xinput(tmp, os.path.join(tmp, 'log'))
+timing.enable(os.devnull)
+settings = Gio.Settings('config.Pointer', '/pointer-config/')
+profiles = profile.get_profiles()
+entry = xinput.get_entries(fake.Manager(devices).list_devices(
+    DeviceType.SLAVE))
+pen = profiles.params.get_child('pen')
+pen.set_boolean('auto', True)
+for name, x in (('left', 0.0), ('right', 0.5)):
+    pen.set_value('matrix', GLib.Variant('(dddddd)', (0.5, 0, 0, 1, x, 0)))
+    profiles.save(name)
+profiles.prepare()
+
+
+def spawns():
+    return timing.report()['count'].get('spawn', 0)
+
+
+def run(function):
+    result = list()
+    first = spawns()
+    for i in range(switches):
+        start = time.time()
+        error = xinput.wait(function, ('left', 'right')[i % 2])
+        result.append(time.time() - start)
+        if error:
+            sys.exit('\n'.join(xinput.format_error(error)))
+    result.sort()
+    return (result[len(result) / 2] * 1000,
+            float(spawns() - first) / switches)
+
+
+def full(name, callback):
+    setup = dict((nick, profiles.get_params(name).get(nick))
+                 for nick in fake.SOURCE)
+    xinput.State(xinput.Xinput()).apply(
+        xinput.build_commands(entry, setup), callback)
+
+
+def switch(name, callback):
+    profiles.switch(name, entry, xinput.State(xinput.Xinput()), callback)
+
+
+try:
+    for function in (full, switch):
+        print '%-7s %8.1f ms median %6.1f spawns/switch' % (
+            (function.__name__,) + run(function))
+finally:
+    shutil.rmtree(tmp)
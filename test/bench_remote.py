@@ -0,0 +1,77 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Round trip of the exported actions against a running instance, in process
+# and from a cold pointer-config --remote client, on a private Xvfb server.
+# usage: dbus-run-session -- python test/bench_remote.py [calls] [display]
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import fake
+from pointerconfig import remote
+from gi.repository import GLib
+
+calls = int((sys.argv[1:] or ['100'])[0])
+name = (sys.argv[2:] or [':94'])[0]
+top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tmp = fake.compile_schemas()
+env = dict(os.environ, DISPLAY=name, GSETTINGS_BACKEND='memory',
+           GSETTINGS_SCHEMA_DIR=tmp, PYTHONPATH=top, XDG_DATA_DIRS=top)
+script = os.path.join(top, 'script', 'pointer-config')
+server = fake.start_xvfb(name)
+instance = None
+try:
+    instance = subprocess.Popen([sys.executable, script, '-t'], env=env)
+    for _ in range(100):
+        try:
+            remote.call('reapply-all')
+            break
+        except GLib.GError:
+            time.sleep(0.1)
+    else:
+        sys.exit('instance did not start')
+
+    for action, arg in (('apply', ['pen']), ('reapply-all', []),
+                        ('set-bounds', ['pen', '0', '0', '800', '600'])):
+        parameter = remote.get_parameter(action, arg)
+        start = time.time()
+        for _ in range(calls):
+            remote.call(action, parameter)
+        elapsed = (time.time() - start) / calls
+        print '%-11s %8.3f ms/call in process' % (action, elapsed * 1000)
+
+    command = [sys.executable, script, '--remote', 'apply', 'pen']
+    result = list()
+    for _ in range(10):
+        start = time.time()
+        if subprocess.call(command, env=env):
+            sys.exit('client failed')
+        result.append(time.time() - start)
+    result.sort()
+    print '%-11s %8.3f ms median cold client' % ('apply', result[5] * 1000)
+finally:
+    if instance:
+        instance.terminate()
+        instance.wait()
+    fake.stop_xvfb(server)
+    shutil.rmtree(tmp)
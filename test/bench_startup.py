@@ -0,0 +1,80 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Cold start of pointer-config --apply against a private Xvfb server, up to
+# the first invocation of the stub xinput from test/fake.py. A second master
+# device gives Xvfb an XTEST slave that is configured as a mouse. Fails when
+# the median is above the target.
+# usage: bench_startup.py [runs] [target ms] [display]
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import fake
+
+runs = int((sys.argv[1:] or ['10'])[0])
+target = float((sys.argv[2:] or ['100'])[0])
+name = (sys.argv[3:] or [':96'])[0]
+top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+tmp = fake.compile_schemas()
+log = os.path.join(tmp, 'log')
+fake.write_xinput(tmp, log)
+
+env = dict(os.environ, DISPLAY=name, GSETTINGS_BACKEND='memory',
+           GSETTINGS_SCHEMA_DIR=tmp, POINTER_CONFIG_BACKEND='xinput',
+           PATH=tmp + os.pathsep + os.environ['PATH'], PYTHONPATH=top)
+arg = [sys.executable, os.path.join(top, 'script', 'pointer-config'),
+       '--apply', '--type', 'mouse,pen,eraser,cursor,touchscreen,touchpad']
+
+
+def run():
+    if os.path.exists(log):
+        os.remove(log)
+    first, start = (None, time.time())
+    process = subprocess.Popen(arg, env=env)
+    while first is None and process.poll() is None:
+        if os.path.exists(log):
+            first = time.time() - start
+        else:
+            time.sleep(0.0005)
+    if first is None and os.path.exists(log):
+        first = time.time() - start
+    process.wait()
+    return (first, time.time() - start)
+
+
+server = fake.start_xvfb(name)
+try:
+    # the real xinput, the stub is only on the PATH of pointer-config
+    command = ['xinput', 'create-master', 'Bench']
+    subprocess.check_call(command, env=dict(os.environ, DISPLAY=name))
+    result = [run() for _ in range(runs)]
+finally:
+    fake.stop_xvfb(server)
+    shutil.rmtree(tmp)
+if None in [r[0] for r in result]:
+    sys.exit('xinput was never invoked')
+median = sorted(r[1] for r in result)[runs / 2] * 1000
+print 'exit        %8.1f ms median' % median
+median = sorted(r[0] for r in result)[runs / 2] * 1000
+print 'first xinput %7.1f ms median' % median
+sys.exit(int(median > target))
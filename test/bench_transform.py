@@ -0,0 +1,50 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Time every (bounds, rotation) matrix of a wall of monitors, batched and
+# one by one through the old cairo chain.
+# usage: bench_transform.py [monitors] [repeat]
+
+import sys
+import timeit
+
+from pointerconfig import transform
+from test_transform import cairo_matrix
+
+monitors = int((sys.argv[1:] or ['16'])[0])
+repeat = int((sys.argv[2:] or ['1000'])[0])
+bounds = [(1920 * (i % 4), 1080 * (i / 4), 1920, 1080)
+          for i in range(monitors)]
+width, height = (1920 * 4, 1080 * ((monitors + 3) / 4))
+
+
+def batch():
+    transform.get_matrices(bounds, transform.ROTATION, width, height)
+
+
+def single():
+    for b in bounds:
+        for rotation in transform.ROTATION:
+            cairo_matrix(b, rotation, width, height)
+
+
+for function in (batch, single):
+    elapsed = timeit.timeit(function, number=repeat) / repeat
+    print '%-7s %8.1f us for %d matrices' % (
+        function.__name__, elapsed * 1e6, monitors * len(transform.ROTATION))
@@ -0,0 +1,82 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Time until an instance started with -t answers on D-Bus, and its resident
+# memory, on a private Xvfb, for each source tree given. To compare against
+# the eager window, check out the parent of the lazy window commit with
+# git worktree add and pass both trees.
+# usage: dbus-run-session -- python test/bench_tray.py [runs] [display]
+#                                                      [tree...]
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import fake
+from pointerconfig import remote
+from gi.repository import GLib
+
+runs = int((sys.argv[1:] or ['5'])[0])
+name = (sys.argv[2:] or [':93'])[0]
+tree = sys.argv[3:] or [
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+tmp = fake.compile_schemas()
+
+
+def rss(pid):
+    for line in open('/proc/%d/status' % pid):
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1]) / 1024.0
+
+
+def start(top):
+    env = dict(os.environ, DISPLAY=name, GSETTINGS_BACKEND='memory',
+               GSETTINGS_SCHEMA_DIR=tmp, PYTHONPATH=top, XDG_DATA_DIRS=top,
+               XDG_CACHE_HOME=tmp)
+    script = os.path.join(top, 'script', 'pointer-config')
+    start = time.time()
+    instance = subprocess.Popen([sys.executable, script, '-t'], env=env)
+    try:
+        for _ in range(1000):
+            try:
+                remote.call('reapply-all')
+                break
+            except GLib.GError:
+                time.sleep(0.005)
+        else:
+            sys.exit('instance did not start')
+        return ((time.time() - start) * 1000, rss(instance.pid))
+    finally:
+        instance.terminate()
+        instance.wait()
+
+
+server = fake.start_xvfb(name)
+try:
+    for top in tree:
+        result = [start(top) for _ in range(runs)]
+        elapsed = sorted(r[0] for r in result)[runs / 2]
+        memory = sorted(r[1] for r in result)[runs / 2]
+        print '%8.1f ms to answer %6.1f MiB resident  %s' % (
+            elapsed, memory, top)
+finally:
+    fake.stop_xvfb(server)
+    shutil.rmtree(tmp)
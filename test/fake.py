@@ -0,0 +1,156 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Stand-ins for the Gdk device manager and the xinput executable, so the
+# apply path can be measured without a display, and the compiled schema and
+# private Xvfb servers the other scripts share.
+
+import ctypes
+import ctypes.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from pointerconfig import Gdk
+from pointerconfig.Gdk import GdkX11
+
+SOURCE = ('mouse', 'pen', 'eraser', 'cursor', 'touchscreen', 'touchpad')
+
+
+class Source(object):
+
+    def __init__(self, nick):
+        self.value_nick = nick
+
+
+class Device(object):
+    ''' slave device with a fixed XID '''
+
+    def __init__(self, xid, name, nick, device_type=Gdk.DeviceType.SLAVE,
+                 vendor=None):
+        self.xid, self.name, self.vendor = (xid, name, vendor)
+        self.source, self.device_type = (Source(nick), device_type)
+
+    def get_name(self):
+        return self.name
+
+    def get_source(self):
+        return self.source
+
+    def get_device_type(self):
+        return self.device_type
+
+    def get_vendor_id(self):
+        return self.vendor
+
+
+class Manager(object):
+    ''' number synthetic slave devices, one source after another '''
+
+    def __init__(self, number, first=10):
+        self.device, self.handler = (list(), dict())
+        for i in range(number):
+            nick = SOURCE[i % len(SOURCE)]
+            name = 'Fake %s %d' % (nick, i)
+            self.device.append(Device(first + i, name, nick))
+
+    def list_devices(self, device_type):
+        return [d for d in self.device if d.device_type == device_type]
+
+    def iter_devices(self, device_type):
+        return iter(self.list_devices(device_type))
+
+    def connect(self, signal, callback):
+        self.handler.setdefault(signal, list()).append(callback)
+
+    def emit(self, signal, device):
+        for callback in self.handler.get(signal, ()):
+            callback(self, device)
+
+    def add(self, device):
+        self.device.append(device)
+        self.emit('device-added', device)
+
+    def remove(self, device):
+        self.device.remove(device)
+        self.emit('device-removed', device)
+
+
+def install():
+    ''' let gdk_x11_device_get_id take fake devices as well as real ones '''
+    real = GdkX11.gdk_x11_device_get_id
+    if getattr(real, 'fake', False):
+        return
+
+    def get_id(device):
+        if isinstance(device, Device):
+            return device.xid
+        return real(device)
+    get_id.fake = True
+    GdkX11.gdk_x11_device_get_id = get_id
+
+
+def write_xinput(directory, log):
+    ''' xinput that logs its arguments and lists no properties '''
+    path = os.path.join(directory, 'xinput')
+    with open(path, 'w') as script:
+        script.write('#!/bin/sh\n'
+                     'echo "$@" >> "%s"\n'
+                     'if [ "$1" = list-props ]; then\n'
+                     '    shift\n'
+                     '    for i; do echo "Device \'Fake\' ($i):"; done\n'
+                     'fi\n' % log)
+    os.chmod(path, 0755)
+    return path
+
+
+def compile_schemas():
+    ''' temporary directory with the compiled schema, removed by the caller '''
+    top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    tmp = tempfile.mkdtemp()
+    shutil.copy(os.path.join(top, 'Pointer.Config.gschema.xml'), tmp)
+    subprocess.check_call(['glib-compile-schemas', tmp])
+    return tmp
+
+
+def start_xvfb(name, timeout=10):
+    ''' private Xvfb server, returned once it accepts connections '''
+    x11 = ctypes.CDLL(ctypes.util.find_library('X11'))
+    x11.XOpenDisplay.restype = ctypes.c_void_p
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    server = subprocess.Popen(['Xvfb', name, '-nolisten', 'tcp'])
+    end = time.time() + timeout
+    while server.poll() is None and time.time() < end:
+        display = x11.XOpenDisplay(name)
+        if display:
+            x11.XCloseDisplay(display)
+            return server
+        time.sleep(0.05)
+    stop_xvfb(server)
+    sys.exit('Xvfb %s did not start' % name)
+
+
+def stop_xvfb(server):
+    if server.poll() is None:
+        server.terminate()
+    server.wait()
@@ -0,0 +1,246 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+# Record device-added/changed/removed events from the device manager, or
+# generate a synthetic storm, and replay one into Registry and Hotplug with
+# fake devices and an in-process backend, without a display. Reports the
+# applies issued, the worst queue depth and the time from the last event
+# until every present device holds its configured values.
+# usage: hotplug_storm.py record FILE [seconds]
+#        hotplug_storm.py generate hub|flap FILE [devices|toggles]
+#        hotplug_storm.py replay FILE [--speed 10] [--delay 200]
+#                                     [--latency 2]
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+from gi.repository import GLib
+
+EVENT = ('device-added', 'device-changed', 'device-removed')
+
+
+def record(arg):
+    from pointerconfig import Gdk
+    from pointerconfig import xinput
+    from pointerconfig.Gdk import GdkX11
+    manager = xinput.get_display().get_device_manager()
+    start, output = (time.time(), open(arg.file, 'w'))
+
+    def handler(event):
+        def callback(manager, device):
+            line = {'t': round(time.time() - start, 6), 'event': event,
+                    'xid': GdkX11.gdk_x11_device_get_id(device),
+                    'name': device.get_name(),
+                    'source': device.get_source().value_nick,
+                    'slave': device.get_device_type() ==
+                    Gdk.DeviceType.SLAVE}
+            output.write(json.dumps(line, sort_keys=True) + '\n')
+            output.flush()
+        return callback
+    for event in EVENT:
+        manager.connect(event, handler(event))
+    loop = GLib.MainLoop()
+    GLib.timeout_add_seconds(arg.seconds, loop.quit)
+    loop.run()
+
+
+def generate(arg):
+    line = list()
+    if arg.kind == 'hub':
+        # every device gone within 100 ms, back within the next 500 ms
+        for i in range(arg.number):
+            device = {'xid': 10 + i, 'name': 'Hub device %d' % i,
+                      'source': ('mouse', 'pen', 'touchpad')[i % 3],
+                      'slave': True}
+            line.append(dict(device, t=round(0.1 * i / arg.number, 6),
+                             event='device-removed'))
+            line.append(dict(device, t=round(0.5 + 0.5 * i / arg.number, 6),
+                             event='device-added'))
+    else:
+        # a tablet on a flaky cable, toggling every 30 to 80 ms
+        device = {'xid': 10, 'name': 'Flaky tablet stylus',
+                  'source': 'pen', 'slave': True}
+        t = 0.0
+        for i in range(arg.number):
+            t += 0.03 + 0.05 * (i * 7 % 11) / 10
+            event = ('device-removed', 'device-added')[i % 2]
+            line.append(dict(device, t=round(t, 6), event=event))
+        if arg.number % 2:
+            line.append(dict(device, t=round(t + 0.05, 6),
+                             event='device-added'))
+    line.sort(key=lambda l: l['t'])
+    with open(arg.file, 'w') as output:
+        for l in line:
+            output.write(json.dumps(l, sort_keys=True) + '\n')
+
+
+class Backend(object):
+    ''' in-process backend answering each write after latency ms '''
+
+    reads_mode = False
+
+    def __init__(self, latency):
+        self.latency, self.write, self.flight, self.depth = (latency, 0, 0, 0)
+
+    def call(self, command, callback, timeout, error):
+        self.write += 1
+        self.flight += 1
+        self.depth = max(self.depth, self.flight)
+
+        def done():
+            self.flight -= 1
+            callback(None)
+            return False
+        GLib.timeout_add(self.latency, done)
+
+    def read(self, query, callback, timeout):
+        GLib.idle_add(callback, dict())
+
+    def flush(self, error):
+        return error
+
+
+def replay(arg):
+    import fake
+    tmp = fake.compile_schemas()
+    os.environ.update(GSETTINGS_BACKEND='memory', GSETTINGS_SCHEMA_DIR=tmp)
+    try:
+        return run_replay(arg)
+    finally:
+        shutil.rmtree(tmp)
+
+
+def run_replay(arg):
+    import fake
+    from pointerconfig import hotplug
+    from pointerconfig import xinput
+    from pointerconfig.Gdk import DeviceType
+    from pointerconfig.Gdk import Registry
+    from gi.repository import Gio
+
+    fake.install()
+    settings = Gio.Settings('config.Pointer', '/pointer-config/')
+    for nick in settings.list_children():
+        settings.get_child(nick).set_boolean('auto', True)
+    params = xinput.ParamCache(settings)
+    backend = Backend(arg.latency)
+    state = xinput.State(backend)
+    line = [json.loads(l) for l in open(arg.file) if l.strip()]
+    if not line:
+        sys.exit('no events in ' + arg.file)
+
+    # devices whose first event is not an arrival are there from the start
+    manager, device, first = (fake.Manager(0), dict(), set())
+    for l in line:
+        if l['xid'] not in first and l['event'] != 'device-added':
+            kind = (DeviceType.MASTER, DeviceType.SLAVE)[l['slave']]
+            device[l['xid']] = fake.Device(l['xid'], l['name'], l['source'],
+                                           kind)
+            manager.device.append(device[l['xid']])
+        first.add(l['xid'])
+    registry = Registry(manager)
+    setup = xinput.load_params(params)
+    command = xinput.build_commands(registry.xid.values(), setup)
+    xinput.wait(state.apply, command)
+    backend.write = backend.depth = 0
+
+    storm = hotplug.Hotplug(manager, registry, state, params, arg.delay)
+    applies, depth = ([0], [0])
+    apply = state.apply
+
+    def counted(command, callback):
+        applies[0] += 1
+        return apply(command, callback)
+    state.apply = counted
+
+    loop, last = (GLib.MainLoop(), [None])
+
+    def emit(l):
+        kind = (DeviceType.MASTER, DeviceType.SLAVE)[l['slave']]
+        if l['event'] == 'device-added':
+            device[l['xid']] = fake.Device(l['xid'], l['name'], l['source'],
+                                           kind)
+            manager.add(device[l['xid']])
+        elif l['xid'] in device and l['event'] == 'device-removed':
+            manager.remove(device.pop(l['xid']))
+        elif l['xid'] in device:
+            manager.emit('device-changed', device[l['xid']])
+        depth[0] = max(depth[0], len(storm.pending) + len(storm.running))
+        if l is line[-1]:
+            last[0] = time.time()
+            GLib.timeout_add(1, settled)
+        return False
+
+    def configured():
+        if storm.pending or storm.running or storm.source:
+            return False
+        setup = xinput.load_params(params)
+        command = xinput.build_commands(registry.xid.values(), setup)
+        for key, value in map(xinput.split_command, command):
+            if not xinput.same_value(state.cache.get(key), value):
+                return False
+        return True
+
+    def settled():
+        if not configured():
+            return True
+        loop.quit()
+        return False
+
+    for l in line:
+        GLib.timeout_add(int(l['t'] * 1000 / arg.speed), emit, l)
+    loop.run()
+    elapsed = (time.time() - last[0]) * 1000
+    print 'events             %8d over %.3f s at %gx' % (
+        len(line), line[-1]['t'], arg.speed)
+    print 'applies issued     %8d' % applies[0]
+    print 'writes             %8d' % backend.write
+    print 'worst queue depth  %8d devices, %d writes in flight' % (
+        depth[0], backend.depth)
+    print 'configured after   %8.1f ms from the last event' % elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers()
+    command = sub.add_parser('record')
+    command.add_argument('file')
+    command.add_argument('seconds', type=int, nargs='?', default=60)
+    command.set_defaults(function=record)
+    command = sub.add_parser('generate')
+    command.add_argument('kind', choices=('hub', 'flap'))
+    command.add_argument('file')
+    command.add_argument('number', type=int, nargs='?', default=20)
+    command.set_defaults(function=generate)
+    command = sub.add_parser('replay')
+    command.add_argument('file')
+    command.add_argument('--speed', type=float, default=1.0)
+    command.add_argument('--delay', type=int, default=200)
+    command.add_argument('--latency', type=int, default=2)
+    command.set_defaults(function=replay)
+    arg = parser.parse_args()
+    arg.function(arg)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from pointerconfig.rules import Rules
+
+
+class TestRules(unittest.TestCase):
+
+    def test_source_without_rules(self):
+        self.assertEqual(Rules().match('Wacom Intuos Pen', 'pen'), 'pen')
+
+    def test_xtest_ignored(self):
+        rule = Rules([('', '', 'mouse', 'touchpad')])
+        self.assertEqual(rule.match('Virtual core XTEST pointer', 'mouse'), '')
+        self.assertEqual(rule.match('Logitech Mouse', 'mouse'), 'touchpad')
+
+    def test_first_match_wins(self):
+        rule = Rules([('Wacom * Pen', '', '', 'cursor'),
+                      ('Wacom Cintiq Pen', '', '', 'eraser'),
+                      ('Wacom*', '', '', 'touchscreen')])
+        self.assertEqual(rule.match('Wacom Cintiq Pen', 'pen'), 'cursor')
+        self.assertEqual(rule.match('Wacom Cintiq Touch', 'pen'),
+                         'touchscreen')
+
+    def test_source_and_vendor(self):
+        rule = Rules([('', '056a', 'touchscreen', 'pen')])
+        self.assertEqual(rule.match('Touch', 'touchscreen', '056A'), 'pen')
+        self.assertEqual(rule.match('Touch', 'touchscreen', '04f3'),
+                         'touchscreen')
+        self.assertEqual(rule.match('Touch', 'mouse', '056a'), 'mouse')
+
+    def test_vendor_read_only_when_needed(self):
+        called = list()
+
+        def vendor():
+            called.append(True)
+            return '056a'
+        rule = Rules([('Pen', '', '', 'cursor'), ('', '056a', '', 'pen')])
+        self.assertEqual(rule.match('Pen', 'pen', vendor), 'cursor')
+        self.assertFalse(called)
+        self.assertEqual(rule.match('Other', 'pen', vendor), 'pen')
+        self.assertTrue(called)
+
+    def test_exact_names_hashed(self):
+        rule = Rules([('Pen %d' % i, '', '', 'cursor') for i in range(100)])
+        self.assertEqual(len(rule.pattern), 0)
+        self.assertEqual(rule.match('Pen 42', 'pen'), 'cursor')
+        self.assertEqual(rule.match('Pen 420', 'pen'), 'pen')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/python
+#
+# Copyright (C) 2012, 2013 Daniel Miedzyblocki
+#
+# This file is part of Pointer Config.
+#
+# Pointer Config is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pointer Config is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pointer Config.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+import random
+import unittest
+
+from pointerconfig import transform
+
+try:
+    import cairo
+except ImportError:
+    cairo = None
+
+
+def cairo_matrix(bounds, rotation, width, height):
+    ''' the matrix as apply_clicked built it before transform.py '''
+    x, y, w, h = bounds
+    horizontal, vertical = (float(width), float(height))
+    matrix = cairo.Matrix(
+        xx=w / horizontal, yy=h / vertical,
+        x0=x / horizontal, y0=y / vertical)
+    matrix.translate(0.5, 0.5)
+    radians = math.radians(rotation)
+    cos, sin = (round(math.cos(radians)), round(math.sin(radians)))
+    matrix = cairo.Matrix(cos, -sin, sin, cos, 0, 0).multiply(matrix)
+    matrix.translate(-0.5, -0.5)
+    return tuple(matrix)
+
+
+def random_case(seed):
+    rand = random.Random(seed)
+    width, height = (rand.randint(640, 7680), rand.randint(480, 4320))
+    bounds = (rand.randint(-width, width), rand.randint(-height, height),
+              rand.randint(1, 2 * width), rand.randint(1, 2 * height))
+    return (bounds, rand.choice(transform.ROTATION), width, height)
+
+
+class TestTransform(unittest.TestCase):
+
+    @unittest.skipIf(cairo is None, 'needs py2cairo')
+    def test_same_as_cairo(self):
+        for seed in range(1000):
+            arg = random_case(seed)
+            expect = cairo_matrix(*arg)
+            for a, b in zip(transform.get_matrix(*arg), expect):
+                self.assertAlmostEqual(a, b, places=12)
+
+    @unittest.skipIf(cairo is None, 'needs py2cairo')
+    def test_bounds_same_as_cairo(self):
+        for seed in range(1000):
+            bounds, rotation, width, height = random_case(seed)
+            matrix = cairo.Matrix(*cairo_matrix(bounds, 0, width, height))
+            matrix = matrix.multiply(cairo.Matrix(xx=width, yy=height))
+            x, y = map(round, matrix.transform_point(0, 0))
+            x2, y2 = map(round, matrix.transform_point(1, 1))
+            expect = (min(x, x2), min(y, y2),
+                      max(abs(x - x2), 1), max(abs(y - y2), 1))
+            matrix = transform.get_matrix(bounds, 0, width, height)
+            self.assertEqual(transform.get_bounds(matrix, width, height),
+                             expect)
+
+    def test_bounds_round_trip(self):
+        for seed in range(1000):
+            bounds, rotation, width, height = random_case(seed)
+            matrix = transform.get_matrix(bounds, rotation, width, height)
+            self.assertEqual(transform.get_bounds(matrix, width, height),
+                             bounds)
+
+    def test_batch_matches_single(self):
+        bounds = [random_case(seed)[0] for seed in range(20)]
+        batch = transform.get_matrices(bounds, transform.ROTATION, 1920, 1080)
+        self.assertEqual(len(batch), len(bounds) * len(transform.ROTATION))
+        for (b, rotation), matrix in batch.items():
+            single = transform.get_matrix(b, rotation, 1920, 1080)
+            self.assertEqual(matrix, single)
+
+    def test_identity(self):
+        matrix = transform.get_matrix((0, 0, 1920, 1080), 0, 1920, 1080)
+        self.assertEqual(matrix, (1, 0, 0, 1, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()